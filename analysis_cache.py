@@ -0,0 +1,98 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from sqlite_lru import SqliteLRU
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(__file__), ".swift_cache", "analyses.sqlite")
+
+
+class AnalysisCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=256 * 1024 * 1024):
+        # Open (or create) the on-disk cache; least recently used analyses are evicted past max_bytes
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS analyses ("
+            "key TEXT PRIMARY KEY, analysis TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS analyses_last_access ON analyses (last_access)"
+        )
+        self.conn.commit()
+        self.lru = SqliteLRU(self.conn, "analyses", "key", max_bytes)
+
+    @staticmethod
+    def make_key(message_log, model, temperature, maxToken, batched=False):
+        # Content-addressed key: the rendered system prompt plus the problem/solution message,
+        # and every model setting that changes the answer
+        settings = {
+            "messages": message_log,
+            "model": model,
+            "temperature": temperature,
+            "max_tokens": maxToken,
+        }
+        if batched:
+            # Answers from batched prompts are kept apart from single-idea answers
+            settings["batched"] = True
+        payload = json.dumps(settings, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        # Return the cached analysis for key, or None on a miss
+        row = self.conn.execute(
+            "SELECT analysis FROM analyses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.conn.execute(
+            "UPDATE analyses SET last_access = ? WHERE key = ?", (time.time(), key)
+        )
+        self.conn.commit()
+        return row[0]
+
+    def put(self, key, analysis):
+        # Store an analysis and evict the least recently used entries if the cache is too big
+        now = time.time()
+        self.lru.put(
+            {"key": key, "analysis": analysis, "size": len(analysis.encode("utf-8")), "created": now, "last_access": now}
+        )
+        self.conn.commit()
+
+    def stats(self):
+        # Hit/miss counters for this session plus the current size of the cache
+        entries, size = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM analyses"
+        ).fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": size}
+
+    def clear(self):
+        # Remove every cached analysis
+        self.lru.clear()
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+# Example usage
+if __name__ == "__main__":
+    cache = AnalysisCache()
+    message_log = [
+        {"role": "system", "content": "You are an expert in sustainability."},
+        {"role": "assistant", "content": "Problem: plastic bottles\n Solution: refill stations"},
+    ]
+    key = AnalysisCache.make_key(message_log, "gpt-3.5-turbo-1106", 0.7, 300)
+    print("First lookup:", cache.get(key))
+    cache.put(key, "1. Filter Out: No - keep idea.")
+    print("Second lookup:", cache.get(key))
+    print(cache.stats())
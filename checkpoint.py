@@ -0,0 +1,86 @@
+import hashlib
+import json
+import os
+
+DEFAULT_CHECKPOINT_DIR = os.path.join(os.path.dirname(__file__), ".swift_cache", "checkpoints")
+
+
+class RunCheckpoint:
+    def __init__(self, run_config: dict, directory=DEFAULT_CHECKPOINT_DIR):
+        # One append-only JSONL file per run configuration (prompt, model and settings)
+        os.makedirs(directory, exist_ok=True)
+        config_json = json.dumps(run_config, sort_keys=True, ensure_ascii=False)
+        self.run_id = hashlib.sha256(config_json.encode("utf-8")).hexdigest()[:16]
+        self.path = os.path.join(directory, f"{self.run_id}.jsonl")
+        self.file = None
+
+    @staticmethod
+    def row_key(row_id, problem, solution):
+        # Identify a row by its id and content so edited rows are scored again
+        payload = json.dumps([str(row_id), problem, solution], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def load(self):
+        # Return {row_key: record} for every row already scored in this configuration
+        completed = {}
+        if not os.path.exists(self.path):
+            return completed
+        with open(self.path, "r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn last line from an interrupted write; that row is simply scored again
+                    continue
+                completed[record["key"]] = record
+        return completed
+
+    def index(self):
+        # Return {row_key: file offset} without keeping analyses in memory; see read()
+        offsets = {}
+        if not os.path.exists(self.path):
+            return offsets
+        with open(self.path, "rb") as file:
+            offset = file.tell()
+            for line in iter(file.readline, b""):
+                try:
+                    offsets[json.loads(line)["key"]] = offset
+                except json.JSONDecodeError:
+                    pass
+                offset = file.tell()
+        return offsets
+
+    def read(self, offset):
+        # Read the record stored at an offset returned by index()
+        with open(self.path, "rb") as file:
+            file.seek(offset)
+            return json.loads(file.readline())
+
+    def record(self, key, **result):
+        # Durably append one finished row before moving on
+        if self.file is None:
+            self.file = open(self.path, "a", encoding="utf-8")
+        self.file.write(json.dumps({"key": key, **result}, ensure_ascii=False) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def reset(self):
+        # Discard the results of previous runs with this configuration
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+# Example usage
+if __name__ == "__main__":
+    checkpoint = RunCheckpoint({"system_prompt": "example", "model": "gpt-3.5-turbo-1106"})
+    key = RunCheckpoint.row_key(1, "The usage of plastic bottles", "Refill stations")
+    checkpoint.record(key, id=1, isFiltered="Keep", analysis="1. Filter Out: No - keep idea.")
+    checkpoint.close()
+    print(checkpoint.path, checkpoint.load())
+    checkpoint.reset()
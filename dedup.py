@@ -0,0 +1,148 @@
+import re
+import zlib
+import numpy as np
+import pandas as pd
+
+SHINGLE_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)  # Odd 64-bit constant for mixing word hashes
+WORD_PATTERN = re.compile(r"\w+")
+
+
+class NearDuplicateIndex:
+    def __init__(self, threshold=0.8, num_perm=128, bands=16, shingle_size=3, seed=42):
+        """
+        MinHash/LSH index of idea texts. Each new text is compared only with the cluster
+        representatives that share at least one LSH band with it, so building the index is
+        sub-quadratic. With 16 bands of 8 rows, pairs above ~0.7 Jaccard similarity become
+        candidates and are kept when their estimated similarity reaches threshold.
+        """
+        assert num_perm % bands == 0, "num_perm must be divisible by bands"
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(0, 2**64, num_perm, dtype=np.uint64, endpoint=False) | np.uint64(1)
+        self.b = rng.integers(0, 2**64, num_perm, dtype=np.uint64, endpoint=False)
+        self.buckets = [{} for _ in range(bands)]  # Band hash -> representative keys
+        self.signatures = {}  # Representative key -> MinHash signature
+
+    def _shingle_hashes(self, text):
+        # 64-bit hashes of the overlapping word n-grams, combined from per-word hashes with NumPy
+        words = WORD_PATTERN.findall(text.lower())
+        word_hashes = np.fromiter(
+            (zlib.crc32(word.encode("utf-8")) for word in words), dtype=np.uint64, count=len(words)
+        )
+        if len(word_hashes) < self.shingle_size:
+            return np.unique(word_hashes) if len(word_hashes) else np.zeros(1, dtype=np.uint64)
+        count = len(word_hashes) - self.shingle_size + 1
+        hashes = np.zeros(count, dtype=np.uint64)
+        for offset in range(self.shingle_size):
+            hashes = hashes * SHINGLE_MULTIPLIER + word_hashes[offset : offset + count]
+        return np.unique(hashes)
+
+    def signature(self, text):
+        # MinHash signature with multiply-shift hashing: the top 32 bits of a * x + b (mod 2^64)
+        hashes = self._shingle_hashes(text)
+        permuted = (self.a[:, None] * hashes[None, :] + self.b[:, None]) >> np.uint64(32)
+        return permuted.min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, signature):
+        return [
+            signature[band * self.rows : (band + 1) * self.rows].tobytes()
+            for band in range(self.bands)
+        ]
+
+    def query(self, text):
+        # Return (representative key, estimated similarity) of the closest cluster, or (None, 0.0)
+        return self._query(self.signature(text))[:2]
+
+    def _query(self, signature):
+        band_keys = self._band_keys(signature)
+        candidates = set()
+        for band, band_key in enumerate(band_keys):
+            candidates.update(self.buckets[band].get(band_key, ()))
+        best_key, best_similarity = None, 0.0
+        for candidate in candidates:
+            similarity = float(np.mean(self.signatures[candidate] == signature))
+            if similarity >= self.threshold and similarity > best_similarity:
+                best_key, best_similarity = candidate, similarity
+        return best_key, best_similarity, band_keys
+
+    def add(self, key, text):
+        """
+        Assigns a text to a cluster and returns (representative key, similarity). When no
+        representative is similar enough, the text starts a new cluster and key is returned.
+        """
+        signature = self.signature(text)
+        representative, similarity, band_keys = self._query(signature)
+        if representative is not None:
+            return representative, similarity
+
+        self.signatures[key] = signature
+        for band, band_key in enumerate(band_keys):
+            self.buckets[band].setdefault(band_key, []).append(key)
+        return key, 1.0
+
+    def __len__(self):
+        # Number of clusters
+        return len(self.signatures)
+
+
+class NearDuplicateGroups:
+    def __init__(self, threshold=0.8):
+        """
+        Near-duplicate grouping shared by the Streamlit app and the CLI, so both give the same
+        verdicts for one CSV. Rows are keyed by their position in the input rather than their
+        id, since a CSV can repeat ids. Rows rejected by the pre-filter are never added, so a
+        near-duplicate of a rejected idea is scored on its own instead of inheriting the rejection.
+        """
+        self.index = NearDuplicateIndex(threshold=threshold)
+
+    def add(self, position, problem, solution):
+        # Position of the row's representative, or None when the row represents its own group
+        text = " ".join("" if pd.isna(field) else str(field) for field in (problem, solution))
+        representative, _ = self.index.add(position, text)
+        return representative if representative != position else None
+
+
+def find_near_duplicates(df, threshold=0.8, exclude=None):
+    """
+    Series aligned with df holding, for each row, the position (in df) of its representative,
+    or None for representatives. Rows where the boolean exclude mask is set (e.g. pre-filter
+    rejects) are left out of the groups and get None.
+    """
+    groups = NearDuplicateGroups(threshold=threshold)
+    excluded = np.zeros(len(df), dtype=bool) if exclude is None else np.asarray(exclude, dtype=bool)
+    duplicate_of = [
+        None if skip else groups.add(position, problem, solution)
+        for position, (problem, solution, skip) in enumerate(zip(df["problem"], df["solution"], excluded))
+    ]
+    return pd.Series(duplicate_of, index=df.index, name="duplicate_of", dtype=object)
+
+
+def duplicate_analysis(representative_id, analysis):
+    # Analysis stored for a near-duplicate: the representative's verdict with a link back to it
+    return f"Near-duplicate of idea {representative_id}; verdict copied from it.\n{analysis}"
+
+
+# Example usage: group the dataset, then time the index on 100k synthetic near-duplicates
+if __name__ == "__main__":
+    import time
+
+    df = pd.read_csv("AI EarthHack Dataset.csv", encoding="ISO-8859-1")
+    duplicate_of = find_near_duplicates(df)
+    print(f"{duplicate_of.notna().sum()} of {len(df)} ideas are near-duplicates of another idea")
+
+    rng = np.random.default_rng(0)
+    texts = (df["problem"].fillna("") + " " + df["solution"].fillna("")).tolist()
+    index = NearDuplicateIndex()
+    start = time.time()
+    for i in range(100_000):
+        words = texts[i % len(texts)].split()
+        # Drop one random word so copies are near (not exact) duplicates
+        if len(words) > 20:
+            del words[rng.integers(len(words))]
+        index.add(str(i), " ".join(words))
+    end = time.time()
+    print(f"Indexed 100000 ideas into {len(index)} clusters in {end - start:.1f}s")
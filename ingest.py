@@ -0,0 +1,54 @@
+import pandas as pd
+
+REQUIRED_COLUMNS = ["problem", "solution"]
+
+
+def missing_columns(columns):
+    # Required columns that are absent from a CSV header
+    return [column for column in REQUIRED_COLUMNS if column not in columns]
+
+
+def iter_idea_chunks(source, chunksize=1000, limit=None, encoding="ISO-8859-1"):
+    """
+    Reads an id,problem,solution CSV in chunks of chunksize rows, so memory stays flat
+    regardless of the file size. Rows with an empty or missing problem are dropped and
+    missing solutions become empty strings. The index keeps each row's position in the file.
+    """
+    reader = pd.read_csv(source, encoding=encoding, chunksize=chunksize)
+    for chunk_number, chunk in enumerate(reader):
+        if chunk_number == 0:
+            missing = missing_columns(chunk.columns)
+            if missing:
+                raise ValueError(
+                    f"Invalid CSV: The CSV file does not contain the required columns {missing}."
+                )
+        if limit is not None:
+            chunk = chunk[chunk.index < limit]
+            if chunk.empty:
+                break
+
+        problem = chunk["problem"]
+        valid = problem.notna() & (problem.astype(str).str.strip() != "")
+        chunk = chunk[valid].copy()
+        chunk["problem"] = chunk["problem"].astype(str)
+        chunk["solution"] = chunk["solution"].fillna("").astype(str)
+        if "id" not in chunk.columns:
+            chunk["id"] = chunk.index
+        yield chunk
+
+
+def iter_ideas(source, chunksize=1000, limit=None, encoding="ISO-8859-1"):
+    # Yield (row position, {"id", "problem", "solution", ...}) one idea at a time
+    for chunk in iter_idea_chunks(source, chunksize, limit, encoding):
+        for idx, record in zip(chunk.index, chunk.to_dict("records")):
+            yield idx, record
+
+
+# Example usage
+if __name__ == "__main__":
+    import resource
+
+    count = 0
+    for chunk in iter_idea_chunks("AI EarthHack Dataset.csv", chunksize=200):
+        count += len(chunk)
+    print(f"{count} valid ideas, peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
@@ -0,0 +1,155 @@
+import argparse
+import hashlib
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def mock_score(text):
+    # Deterministic SWIFT score so repeated runs are comparable
+    return int(hashlib.sha256(text.encode("utf-8")).hexdigest(), 16) % 101
+
+
+def mock_batch_analysis(prompt):
+    # JSON answer for a batched prompt, one entry per "Idea id: <number>" block
+    results = []
+    for number, idea in re.findall(r"Idea id: (\d+)\n(.*?)(?=\n\nIdea id: |\Z)", prompt, re.S):
+        score = mock_score(idea)
+        results.append(
+            {
+                "id": int(number),
+                "filter_out": "Yes" if score < 50 else "No",
+                "swift_score": score,
+                "analysis": "- Environmental impact: mock evaluation.",
+                "conclusion": f"This is a mock analysis with a SWIFT score of {score}.",
+            }
+        )
+    return json.dumps({"results": results})
+
+
+def mock_analysis(prompt):
+    # Deterministic SWIFT-style answer for a single idea
+    score = mock_score(prompt)
+    filter_out = "Yes - remove idea." if score < 50 else "No - keep idea."
+    return (
+        f"1. Filter Out: {filter_out}\n"
+        f"2. SWIFT Score: {score} out of 100.\n"
+        "3. Analysis Explanation:\n"
+        "- Environmental impact: mock evaluation.\n"
+        "- Economic viability: mock evaluation.\n"
+        "- Scalability: mock evaluation.\n"
+        f"4. Conclusion: This is a mock analysis with a SWIFT score of {score}."
+    )
+
+
+class MockChatCompletionHandler(BaseHTTPRequestHandler):
+    latency = 1.0  # Seconds to wait before answering, to mimic a real round trip
+    token_interval = 0.0  # Seconds between streamed chunks, to mimic generation speed
+
+    def do_POST(self):
+        # Answer any POST as a chat completion request
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        messages = request.get("messages", [])
+        prompt = "\n".join(message.get("content", "") for message in messages)
+
+        time.sleep(self.latency)
+
+        if request.get("response_format", {}).get("type") == "json_object":
+            content = mock_batch_analysis(messages[-1].get("content", ""))
+        else:
+            content = mock_analysis(messages[-1].get("content", "") if messages else "")
+        if request.get("stream"):
+            self._stream(request, content)
+            return
+
+        prompt_tokens = len(prompt) // 4
+        completion_tokens = len(content) // 4
+        body = json.dumps(
+            {
+                "id": "chatcmpl-mock",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", ""),
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+            }
+        ).encode("utf-8")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self, request, content):
+        # Server-sent events with one word per chunk, as the API sends for stream=True
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        def send_chunk(delta, finish_reason=None):
+            chunk = {
+                "id": "chatcmpl-mock",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": request.get("model", ""),
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        send_chunk({"role": "assistant", "content": ""})
+        for piece in re.findall(r"\S+\s*", content):
+            time.sleep(self.token_interval)
+            send_chunk({"content": piece})
+        send_chunk({}, "stop")
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        # Keep benchmark output readable
+        pass
+
+
+def start_mock_server(host="127.0.0.1", port=0, latency=1.0, token_interval=0.0):
+    # Start the mock server in a background thread and return it with its API base URL
+    handler = type(
+        "Handler", (MockChatCompletionHandler,), {"latency": latency, "token_interval": token_interval}
+    )
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+# Example usage: python mock_openai_server.py --port 8000 --latency 1.0 --token-interval 0.02
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local mock of the OpenAI chat completion API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=1.0)
+    parser.add_argument("--token-interval", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server, api_base = start_mock_server(args.host, args.port, args.latency, args.token_interval)
+    print(f"Mock chat completion server listening on {api_base}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,114 @@
+import re
+import numpy as np
+import pandas as pd
+
+# Word stems that mark an idea as sustainability related; each must start a word, and "eco"
+# only counts on its own or as eco-, ecolog* and ecosystem* (not economy, second, become)
+SUSTAINABILITY_KEYWORDS = [
+    "sustainab", "recycl", "reus", "circular", "waste", "emission", "carbon",
+    "energy", "renewab", "environment", "climate", "pollut", "plastic", "repair",
+    "refurbish", "compost", "resource", "recover", "biodegrad", "landfill", "green",
+    r"eco(?:\b|-|logic|system)", "solar", "water", "textile", "packag", "upcycl", "material",
+    "warming", "food", "spoil", "rental", "sharing", "second-hand", "secondhand", "fossil",
+]
+KEYWORD_PATTERN = r"\b(?:" + "|".join(SUSTAINABILITY_KEYWORDS) + ")"
+# Sentence breaks: runs of . ! ? whatever follows them (but not a decimal point), line breaks
+# and bullet markers, so "more.If we" and bulleted lists count every sentence
+SENTENCE_BREAK = r"[.!?]+(?!\d)|[\r\n]+|[•·▪]|(?:^|\s)[-*](?=\s)"
+WORD = re.compile(r"\w")
+
+
+class PreFilter:
+    def __init__(self, min_sentences=3, min_words=25, min_keyword_hits=1, check_duplicates=True, short_words=60):
+        # Thresholds for the obvious rejects; anything borderline is left for the LLM
+        self.check_duplicates = check_duplicates  # Off when near-duplicates share a verdict instead
+        # Sentences required across problem and solution, as in the scoring prompt's
+        # "sloppy (short length e.g. less than 3 sentences)"; only ideas shorter than short_words
+        # words are rejected for it, so long run-on texts are left for the LLM
+        self.min_sentences = min_sentences
+        self.short_words = short_words
+        self.min_words = min_words  # Words required across problem and solution
+        self.min_keyword_hits = min_keyword_hits  # Sustainability keyword matches required
+        self.seen = {}  # Hash of normalized text -> id of the first idea with that text
+
+    def apply(self, chunk):
+        """
+        Returns a Series of rejection reasons aligned with chunk ("" keeps the idea for the LLM).
+        Duplicates are tracked across calls, so chunks of one file must be passed in order.
+        """
+        problem = chunk["problem"].fillna("").astype(str)
+        solution = chunk["solution"].fillna("").astype(str)
+        text = problem + " " + solution
+
+        # Sentences are the pieces between sentence breaks that contain a word, in each field
+        sentences = sum(
+            field.str.split(SENTENCE_BREAK, regex=True).map(
+                lambda pieces: sum(1 for piece in pieces if WORD.search(piece))
+            )
+            for field in (problem, solution)
+        )
+        words = text.str.split().str.len().fillna(0).astype(int)
+        keyword_hits = text.str.lower().str.count(KEYWORD_PATTERN)
+
+        # Exact duplicates (ignoring case and whitespace) of an earlier idea
+        ids = chunk["id"] if "id" in chunk.columns else pd.Series(chunk.index, index=chunk.index)
+        ids = ids.astype(str)
+        normalized = text.str.lower().str.replace(r"\s+", " ", regex=True).str.strip()
+        digests = pd.util.hash_pandas_object(normalized, index=False)
+        repeated = digests.duplicated()
+        first_in_chunk = ids.groupby(digests.to_numpy()).transform("first")
+        earlier_chunk = digests.map(self.seen).astype(object)
+        duplicate_of = earlier_chunk.where(
+            earlier_chunk.notna(), first_in_chunk.where(repeated, None)
+        )
+        new = ~repeated & earlier_chunk.isna()
+        self.seen.update(zip(digests[new], ids[new]))
+
+        conditions = [
+            duplicate_of.notna().to_numpy() & self.check_duplicates,
+            (words < self.min_words).to_numpy(),
+            ((sentences < self.min_sentences) & (words < self.short_words)).to_numpy(),
+            (keyword_hits < self.min_keyword_hits).to_numpy(),
+        ]
+        choices = [
+            "Duplicate of idea " + duplicate_of.astype(str),
+            "Sloppy: only " + words.astype(str) + " words",
+            "Sloppy: only " + sentences.astype(str) + " sentence(s)",
+            pd.Series("Off-topic: no sustainability keywords", index=chunk.index),
+        ]
+        reasons = np.select(conditions, [choice.to_numpy() for choice in choices], default="")
+        return pd.Series(reasons, index=chunk.index, name="prefilter_reason")
+
+
+def prefilter_analysis(reason):
+    # Analysis text stored for ideas rejected without an API call
+    return f"1. Filter Out: Yes - remove idea.\n2. SWIFT Score: 0 out of 100.\n3. Analysis Explanation: Rejected by the local pre-filter. {reason}."
+
+
+# Example usage
+if __name__ == "__main__":
+    import time
+
+    # Sentences without a space after the full stop, and bulleted lines, all count
+    shapes = pd.DataFrame(
+        {
+            "problem": [
+                "Plastic waste grows every year.It ends up in rivers.Cities pay to clean it up.",
+                "Food waste in canteens:\n- Leftovers are thrown away\n- Nobody tracks portions\n- Compost bins are missing",
+                "Recycling rates rose only 6.4% last year.",
+            ],
+            "solution": ["Deposit machines refund bottles.", "A portion planner for kitchens", "Ban plastic."],
+        }
+    )
+    sentence_reasons = PreFilter(min_words=0).apply(shapes)
+    assert sentence_reasons.tolist()[:2] == ["", ""], sentence_reasons.tolist()
+    # A decimal point does not end a sentence, so a genuinely short idea is still rejected
+    assert sentence_reasons.iat[2] == "Sloppy: only 2 sentence(s)", sentence_reasons.iat[2]
+
+    df = pd.read_csv("AI EarthHack Dataset.csv", encoding="ISO-8859-1")
+    start = time.time()
+    reasons = PreFilter().apply(df)
+    end = time.time()
+    print(f"Pre-filtered {len(df)} ideas in {(end - start) * 1000:.1f} ms")
+    print(f"{(reasons != '').sum()} obvious rejects skip the LLM:")
+    print(reasons[reasons != ""].str.split(":").str[0].value_counts())
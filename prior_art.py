@@ -0,0 +1,264 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import zlib
+import numpy as np
+
+DEFAULT_INDEX_PATH = os.path.join(os.path.dirname(__file__), ".swift_cache", "prior_art.sqlite")
+FEATURE_DIM = 1024  # Hashed feature buckets per idea
+MIN_SIMILARITY = 0.3  # Neighbours below this cosine similarity are not worth showing
+NEIGHBOURS = 3  # Similar earlier ideas shown per idea by default
+WORD_PATTERN = re.compile(r"[a-z]{4,}")
+STOPWORDS = frozenset(
+    "about also been being both could does each even from have into just like make many more "
+    "most much must only other over same should some such than that their them then there "
+    "these they this those through under very what when where which while will with within "
+    "without would your problem solution".split()
+)
+
+
+def idea_text(problem, solution):
+    return f"{problem} {solution}"
+
+
+def hashed_features(text):
+    # Sparse (buckets, weights) of the idea's content words: signed feature hashing, 1 + log(tf)
+    counts = {}
+    for word in WORD_PATTERN.findall(text.lower()):
+        if word in STOPWORDS:
+            continue
+        # Crude plural folding, so "bottle" and "bottles" share a feature
+        if word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        digest = zlib.crc32(word.encode("utf-8"))
+        bucket, sign = digest % FEATURE_DIM, 1.0 if digest & 0x80000000 else -1.0
+        counts[bucket] = counts.get(bucket, 0.0) + sign
+    buckets = np.fromiter((b for b, c in counts.items() if c), dtype=np.uint16)
+    weights = np.array([counts[b] for b in buckets.tolist()], dtype=np.float32)
+    return buckets, np.sign(weights) * (1.0 + np.log(np.abs(weights)))
+
+
+class PriorArtIndex:
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        """
+        Persistent similarity index over every idea ever submitted, for "has this been proposed
+        before?" lookups. Ideas are hashed into FEATURE_DIM term buckets weighted by inverse
+        document frequency and kept in an inverted index, so a query only touches the ideas that
+        share a word with it and takes a few milliseconds even for 100k ideas. Ideas are keyed by
+        their text, so uploading the same CSV again adds nothing, and each idea only ever sees
+        ideas inserted before it as prior art.
+
+        Each idea's IDF weights are fixed when it is inserted, from the ideas before it, and a
+        query at a position only uses the ideas before that position. Neighbours and their
+        similarities therefore never change as later ideas are added, and neither do the prompts
+        (and analysis cache keys) built from them.
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        # Shared between Streamlit sessions, so access is serialised with a lock
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS ideas ("
+            "seq INTEGER PRIMARY KEY, key TEXT UNIQUE NOT NULL, id TEXT NOT NULL, "
+            "problem TEXT NOT NULL, solution TEXT NOT NULL, buckets BLOB NOT NULL, weights BLOB NOT NULL)"
+        )
+        self.conn.commit()
+
+        # Weighted, normalised features of every idea in insertion order; the inverted index is
+        # extended with the ideas added since it was last used
+        self.seqs = {}  # Key -> position in insertion order
+        self.ids = []
+        self.features = []
+        self.document_frequency = np.zeros(FEATURE_DIM, dtype=np.int64)
+        self.postings = (np.zeros(FEATURE_DIM + 1, dtype=np.int64), np.empty(0, np.int64), np.empty(0, np.float32))
+        self.indexed = 0  # Ideas already in the postings
+        for key, idea_id, buckets, weights in self.conn.execute(
+            "SELECT key, id, buckets, weights FROM ideas ORDER BY seq"
+        ):
+            self._append(
+                key, idea_id, np.frombuffer(buckets, dtype=np.uint16), np.frombuffer(weights, dtype=np.float32)
+            )
+
+    @staticmethod
+    def make_key(problem, solution):
+        payload = json.dumps([problem, solution], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _weigh(buckets, weights, document_frequency, documents):
+        # Term weights times IDF over the given number of earlier ideas, normalised to unit length
+        idf = np.log((1 + documents) / (1 + document_frequency)).astype(np.float32) + 1.0
+        weights = weights * idf
+        norm = np.linalg.norm(weights)
+        return weights / norm if norm else weights
+
+    def _append(self, key, idea_id, buckets, weights):
+        # Stored weights are the raw term weights; the IDF ones are derived from the ideas before
+        self.features.append(
+            (buckets, self._weigh(buckets, weights, self.document_frequency[buckets], len(self.ids)))
+        )
+        self.seqs[key] = len(self.ids)
+        self.ids.append(idea_id)
+        self.document_frequency[buckets] += 1
+
+    def add_many(self, ids, problems, solutions):
+        # Insert ideas that are not indexed yet; returns each idea's position in insertion order
+        positions = []
+        added = []
+        with self.lock:
+            for idea_id, problem, solution in zip(ids, problems, solutions):
+                key = self.make_key(problem, solution)
+                if key not in self.seqs:
+                    buckets, weights = hashed_features(idea_text(problem, solution))
+                    added.append((len(self.ids), key, str(idea_id), problem, solution, buckets.tobytes(), weights.tobytes()))
+                    self._append(key, str(idea_id), buckets, weights)
+                positions.append(self.seqs[key])
+            if added:
+                self.conn.executemany("INSERT INTO ideas VALUES (?, ?, ?, ?, ?, ?, ?)", added)
+                self.conn.commit()
+        return positions
+
+    def _get_postings(self):
+        """
+        Inverted index over the feature buckets: for bucket b, postings[indptr[b]:indptr[b + 1]]
+        are the ideas that use it, in insertion order, with their weights. Weights never change
+        once an idea is in, so new ideas are inserted at the end of their buckets' spans.
+        """
+        if self.indexed < len(self.features):
+            indptr, seqs, weights = self.postings
+            new = self.features[self.indexed :]
+            sizes = np.fromiter((len(buckets) for buckets, _ in new), dtype=np.int64, count=len(new))
+            new_buckets = np.concatenate([b for b, _ in new])
+            order = np.argsort(new_buckets, kind="stable")
+            new_seqs = np.repeat(np.arange(self.indexed, len(self.features)), sizes)[order]
+            new_weights = np.concatenate([w for _, w in new])[order]
+            new_buckets = new_buckets[order]
+            # Values inserted at the same index keep their order, so each span stays sorted by seq
+            at = indptr[new_buckets.astype(np.int64) + 1]
+            counts = np.bincount(new_buckets, minlength=FEATURE_DIM)
+            indptr = indptr.copy()
+            indptr[1:] += np.cumsum(counts)
+            self.postings = (indptr, np.insert(seqs, at, new_seqs), np.insert(weights, at, new_weights))
+            self.indexed = len(self.features)
+        return self.postings
+
+    def _scores(self, problem, solution, limit):
+        # Cosine similarity of one query to the first limit ideas, touching only the postings of its
+        # words; the query is weighted with IDF over those same ideas
+        indptr, seqs, weights = self._get_postings()
+        buckets, query_weights = hashed_features(idea_text(problem, solution))
+        # Spans are sorted by seq, so each one is cut where the ideas at or after limit start
+        starts = indptr[buckets.astype(np.int64)]
+        ends = np.array(
+            [start + np.searchsorted(seqs[start:end], limit) for start, end in zip(starts, indptr[buckets.astype(np.int64) + 1])],
+            dtype=np.int64,
+        )
+        query_weights = self._weigh(buckets, query_weights, ends - starts, limit)
+        if not query_weights.any():
+            return np.zeros(limit)
+        spans = [np.arange(start, end) for start, end in zip(starts.tolist(), ends.tolist())]
+        postings = np.concatenate(spans) if spans else np.empty(0, np.int64)
+        contributions = weights[postings] * np.repeat(query_weights, [len(span) for span in spans])
+        return np.bincount(seqs[postings], contributions, minlength=limit)
+
+    def neighbours_many(self, problems, solutions, positions=None, k=NEIGHBOURS, min_similarity=MIN_SIMILARITY):
+        """
+        Top-k most similar indexed ideas for each query, as lists of {"id", "similarity",
+        "problem", "solution"}, best first. With positions (from add_many), query i only sees
+        ideas inserted before positions[i], so an idea is never its own prior art.
+        """
+        found = []
+        with self.lock:
+            for i, (problem, solution) in enumerate(zip(problems, solutions)):
+                limit = len(self.ids) if positions is None else positions[i]
+                scores = self._scores(problem, solution, limit)
+                top_k = min(k, len(scores))
+                if top_k == 0:
+                    found.append([])
+                    continue
+                # argpartition finds the top k in linear time; only those k are sorted
+                top = np.argpartition(-scores, top_k - 1)[:top_k]
+                top = top[np.argsort(-scores[top], kind="stable")]
+                found.append([(int(seq), float(scores[seq])) for seq in top if scores[seq] >= min_similarity])
+
+            # Texts are read from disk only for the neighbours actually returned
+            seqs = sorted({seq for neighbours in found for seq, _ in neighbours})
+            texts = {}
+            for start in range(0, len(seqs), 500):
+                batch = seqs[start : start + 500]
+                texts.update(
+                    (seq, (problem, solution))
+                    for seq, problem, solution in self.conn.execute(
+                        f"SELECT seq, problem, solution FROM ideas WHERE seq IN ({','.join('?' * len(batch))})",
+                        batch,
+                    )
+                )
+        return [
+            [
+                {"id": self.ids[seq], "similarity": round(similarity, 3), "problem": texts[seq][0], "solution": texts[seq][1]}
+                for seq, similarity in neighbours
+            ]
+            for neighbours in found
+        ]
+
+    def neighbours(self, problem, solution, k=NEIGHBOURS, min_similarity=MIN_SIMILARITY):
+        return self.neighbours_many([problem], [solution], k=k, min_similarity=min_similarity)[0]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def close(self):
+        self.conn.close()
+
+
+def format_prior_art(neighbours, max_chars=300):
+    # Prompt text listing the similar earlier ideas, each shortened to max_chars
+    lines = []
+    for neighbour in neighbours:
+        text = f"Problem: {neighbour['problem']} Solution: {neighbour['solution']}"
+        if len(text) > max_chars:
+            text = text[:max_chars].rsplit(" ", 1)[0] + "..."
+        lines.append(f"- Idea {neighbour['id']} ({neighbour['similarity']:.0%} similar): {text}")
+    return "\n".join(lines)
+
+
+def prior_art_summary(neighbours):
+    # Short "id (similarity)" list stored with each result
+    return "; ".join(f"{neighbour['id']} ({neighbour['similarity']:.2f})" for neighbour in neighbours)
+
+
+# Example usage: index the dataset, then time lookups against 100k synthetic ideas
+if __name__ == "__main__":
+    import tempfile
+    import time
+    import pandas as pd
+
+    df = pd.read_csv("AI EarthHack Dataset.csv", encoding="ISO-8859-1").dropna(subset=["problem"])
+    df["solution"] = df["solution"].fillna("")
+    index = PriorArtIndex(os.path.join(tempfile.mkdtemp(), "prior_art.sqlite"))
+    start = time.time()
+    positions = index.add_many(df["id"], df["problem"], df["solution"])
+    print(f"Indexed {len(index)} ideas in {time.time() - start:.2f}s")
+    neighbours = index.neighbours_many(df["problem"], df["solution"], positions)
+    with_prior_art = [i for i, found in enumerate(neighbours) if found]
+    print(f"{len(with_prior_art)} of {len(df)} ideas have similar earlier ideas, e.g. idea {df['id'].iloc[with_prior_art[-1]]}:")
+    print(df["problem"].iloc[with_prior_art[-1]][:300])
+    print(format_prior_art(neighbours[with_prior_art[-1]]))
+
+    rng = np.random.default_rng(0)
+    texts = (df["problem"] + " " + df["solution"]).tolist()
+    ids = [f"synthetic-{i}" for i in range(100_000)]
+    problems = [" ".join(rng.permutation(texts[i % len(texts)].split())[:60]) for i in range(100_000)]
+    start = time.time()
+    index.add_many(ids, problems, [""] * len(problems))
+    print(f"Added 100000 ideas in {time.time() - start:.1f}s")
+    index.neighbours("Plastic bottles pollute oceans", "Refill stations in supermarkets")  # Builds the postings
+    start = time.time()
+    for problem in df["problem"].head(100):
+        index.neighbours(problem, "")
+    print(f"Top-3 lookup over {len(index)} ideas: {(time.time() - start) * 10:.1f} ms")
@@ -0,0 +1,392 @@
+import asyncio
+import json
+import time
+from collections import deque
+import openai
+from verdict import parse_verdict
+
+MODEL_NAME = "gpt-3.5-turbo-1106"  # The name of the OpenAI chatbot model to use
+
+# Extra instructions appended to the system prompt for each filtering level
+FILTER_PROMPTS = {
+    "Loose Filter": "Be a loose filter where most ideas will pass.",
+    "Normal Filter": "",
+    "Strict Filter": "Be an extremely strict filter where very little ideas will pass and you are super critical of all aspects of an idea such the business model and whether an existing solution already exists.",
+}
+
+
+def build_system_prompt(filter_prompt, formatting, criterias):
+    # Render the SWIFT system prompt for the selected filter level, format and criterias
+    return f"You are an expert in sustainability and are very selective about which circular economy ideas will work, given most fail due to there being pre-existing solutions, economic inviability, inability to scale, and technological and business risks. You will receive a problem followed by a solution. Only approve ideas that are meticulously and professionally crafted, well-articulated, and hold tangible relevance. Filtering strictness: {filter_prompt}. In separate lines, mention 3 points. Point 1 - Filter Out Yes or No. Remove if the idea if any of the following applies: sloppy (short length e.g. less than 3 sentences), off-topic (i.e., not sustainability related), unsuitable, or vague (such as the over-generic content that prioritizes form over substance, offering generalities instead of specific details) and if it doesn't clearly specify how it addresses all the evaluation criterias listed below. Return either (Yes - remove idea.) if it falls under one of those categories or (No - keep idea.) if it does not. Point 2 - SWIFT Score: a SWIFT score out of 100 as to whether to filter out the idea (100 - keep, 0 - filter out). This should align with point 1. Point 3 - Analysis Explanation: {formatting} supporting whether to keep or remove the idea from 1. Evaluate on the following criterias: {criterias}. Finally, write a one sentence conclusion that explains why the idea is filtered out and the filter score using the criterias listed. Output format: In separate lines, mention the 3 points: 1. Filter Out: Yes or No. 2. SWIFT Score: Out of 100. 3. Analysis Explanation: 4. Conclusion:"
+
+
+def build_message_log(problem, solution, system_prompt, prior_art=""):
+    # Build the conversation sent to the model for a single problem/solution pair, optionally
+    # followed by similar ideas submitted earlier (see prior_art.format_prior_art)
+    content = "Problem: " + problem + "\n Solution: " + solution
+    if prior_art:
+        content += "\n Similar ideas submitted earlier (consider whether this idea is a pre-existing solution):\n" + prior_art
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "assistant", "content": content},
+    ]
+
+
+def build_batch_message_log(message_logs):
+    # Pack several single-idea message logs (sharing one system prompt) into one request
+    system_prompt = message_logs[0][0]["content"]
+    ideas = "\n\n".join(
+        f"Idea id: {number}\n{message_log[1]['content']}"
+        for number, message_log in enumerate(message_logs, start=1)
+    )
+    return [
+        {
+            "role": "system",
+            "content": system_prompt
+            + f" You will receive {len(message_logs)} ideas, each introduced by 'Idea id: <number>'. Evaluate every idea independently with the points above. Respond only with a JSON object of the form "
+            + '{"results": [{"id": <number>, "filter_out": "Yes" or "No", "swift_score": <0-100>, "analysis": "<analysis explanation>", "conclusion": "<one sentence conclusion>"}]}'
+            + " containing exactly one entry per idea.",
+        },
+        {"role": "assistant", "content": ideas},
+    ]
+
+
+def parse_batch_response(response, count):
+    # Map each idea's position in the batch to an analysis in the single-idea format.
+    # Ideas whose entry is missing or malformed are left out so they can be retried alone.
+    try:
+        results = json.loads(response)["results"]
+    except (json.JSONDecodeError, KeyError, TypeError):
+        return {}
+
+    analyses = {}
+    for result in results if isinstance(results, list) else []:
+        try:
+            number = int(result["id"])
+            filter_out = str(result["filter_out"]).strip().lower()
+            score = int(result["swift_score"])
+            explanation = str(result["analysis"])
+            conclusion = str(result["conclusion"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if not 1 <= number <= count or not 0 <= score <= 100:
+            continue
+        if filter_out.startswith("yes"):
+            verdict = "Yes - remove idea."
+        elif filter_out.startswith("no"):
+            verdict = "No - keep idea."
+        else:
+            continue
+        analyses[number - 1] = (
+            f"1. Filter Out: {verdict}\n2. SWIFT Score: {score} out of 100.\n"
+            f"3. Analysis Explanation: {explanation}\n4. Conclusion: {conclusion}"
+        )
+    return analyses
+
+
+def parse_is_filtered(analysis):
+    # Determine if the idea should be filtered from the "Filter Out" point of the analysis
+    return parse_verdict(analysis)["isFiltered"]
+
+
+def estimate_tokens(message_log, maxToken):
+    # Rough token estimate (~4 characters per token) plus the completion budget
+    prompt_chars = sum(len(message["content"]) for message in message_log)
+    return prompt_chars // 4 + maxToken
+
+
+# Function to send a message to the OpenAI chatbot model and return its response
+async def send_message(
+    message_log,
+    maxToken,
+    model=MODEL_NAME,
+    temperature=0.7,
+    api_base=None,
+    response_format=None,
+    on_token=None,
+):
+    # JSON mode is only requested for batched prompts
+    extra = {"response_format": response_format} if response_format else {}
+    if on_token is not None:
+        return await stream_message(message_log, maxToken, model, temperature, api_base, on_token, **extra)
+
+    # Use OpenAI's ChatCompletion API to get the chatbot's response without blocking the event loop
+    response = await openai.ChatCompletion.acreate(
+        model=model,
+        messages=message_log,  # The conversation history up to this point, as a list of dictionaries
+        max_tokens=maxToken,  # The maximum number of tokens (words or subwords) in the generated response
+        stop=None,  # The stopping sequence for the generated response, if any (not used here)
+        temperature=temperature,  # The "creativity" of the generated response (higher temperature = more creative)
+        api_base=api_base,  # Override to point at a local mock server when benchmarking offline
+        **extra,
+    )
+
+    # Find the first response from the chatbot that has text in it (some responses may not have text)
+    for choice in response.choices:
+        if "text" in choice:
+            return choice.text
+
+    # If no response with text is found, return the first response's content (which may be empty)
+    return response.choices[0].message.content
+
+
+async def stream_message(message_log, maxToken, model, temperature, api_base, on_token, **extra):
+    # Like send_message, but the answer is streamed: on_token(text) receives the text so far
+    # after every chunk, so a caller can show it while it is being written
+    response = await openai.ChatCompletion.acreate(
+        model=model,
+        messages=message_log,
+        max_tokens=maxToken,
+        stop=None,
+        temperature=temperature,
+        api_base=api_base,
+        stream=True,
+        **extra,
+    )
+    text = ""
+    async for chunk in response:
+        piece = chunk.choices[0].get("delta", {}).get("content") if chunk.choices else None
+        if piece:
+            text += piece
+            on_token(text)
+    return text
+
+
+class RateLimiter:
+    WINDOW = 60.0  # Length of the sliding window in seconds
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None):
+        # A limit of None disables that budget
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.window = deque()  # (timestamp, tokens) for every request in the last minute
+        self.window_tokens = 0
+        self.lock = asyncio.Lock()  # Serializes waiters so requests are admitted in order
+
+    def _expire(self, now):
+        # Drop requests that have left the sliding window
+        while self.window and now - self.window[0][0] >= self.WINDOW:
+            self.window_tokens -= self.window.popleft()[1]
+
+    def _has_budget(self, tokens):
+        if not self.window:
+            # Always admit a request into an empty window, even if it alone exceeds the token budget
+            return True
+        if self.requests_per_minute and len(self.window) >= self.requests_per_minute:
+            return False
+        if self.tokens_per_minute and self.window_tokens + tokens > self.tokens_per_minute:
+            return False
+        return True
+
+    async def acquire(self, tokens):
+        # Wait until both the request and the token budget allow another call
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self._expire(now)
+                if self._has_budget(tokens):
+                    self.window.append((now, tokens))
+                    self.window_tokens += tokens
+                    return
+                # Sleep until the oldest request leaves the window
+                await asyncio.sleep(self.WINDOW - (now - self.window[0][0]))
+
+
+class ScoringEngine:
+    MAX_RETRIES = 3  # Retries for a call rejected by the API rate limit
+    MAX_COMPLETION_TOKENS = 4096  # Completion limit of the model, which caps batched requests
+
+    def __init__(
+        self,
+        maxToken=300,
+        model=MODEL_NAME,
+        temperature=0.7,
+        concurrency=8,
+        requests_per_minute=None,
+        tokens_per_minute=None,
+        api_base=None,
+        cache=None,
+        batch_size=1,
+    ):
+        self.maxToken = maxToken
+        self.model = model
+        self.temperature = temperature
+        self.concurrency = concurrency  # Maximum number of requests in flight at once
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.api_base = api_base
+        self.cache = cache  # Optional AnalysisCache consulted before every API call
+        self.batch_size = self.effective_batch_size(batch_size, maxToken)
+
+    @classmethod
+    def effective_batch_size(cls, batch_size, maxToken):
+        # Ideas packed into one request; limited so every idea keeps maxToken of completion
+        return max(1, min(batch_size, cls.MAX_COMPLETION_TOKENS // maxToken))
+
+    async def score(self, message_log, semaphore, rate_limiter, on_token=None):
+        # Score a single idea from the cache, or from the API on a miss. With on_token, the
+        # answer is streamed and on_token(text) sees it grow; cache hits arrive whole.
+        if self.cache is None:
+            return await self._request(message_log, semaphore, rate_limiter, on_token=on_token)
+
+        key = self.cache.make_key(message_log, self.model, self.temperature, self.maxToken)
+        analysis = self.cache.get(key)
+        if analysis is None:
+            analysis = await self._request(message_log, semaphore, rate_limiter, on_token=on_token)
+            self.cache.put(key, analysis)
+        return analysis
+
+    async def score_batch(self, message_logs, semaphore, rate_limiter):
+        # Score several ideas with one request, falling back to single calls for any idea
+        # whose structured result is missing or malformed. Returns analyses in input order.
+        analyses = [None] * len(message_logs)
+        keys = [None] * len(message_logs)
+        if self.cache is not None:
+            for i, message_log in enumerate(message_logs):
+                keys[i] = self.cache.make_key(
+                    message_log, self.model, self.temperature, self.maxToken, batched=True
+                )
+                analyses[i] = self.cache.get(keys[i])
+
+        todo = [i for i, analysis in enumerate(analyses) if analysis is None]
+        if len(todo) > 1:
+            response = await self._request(
+                build_batch_message_log([message_logs[i] for i in todo]),
+                semaphore,
+                rate_limiter,
+                maxToken=self.maxToken * len(todo),
+                response_format={"type": "json_object"},
+            )
+            for position, analysis in parse_batch_response(response, len(todo)).items():
+                i = todo[position]
+                analyses[i] = analysis
+                if self.cache is not None:
+                    self.cache.put(keys[i], analysis)
+
+        fallback = [i for i, analysis in enumerate(analyses) if analysis is None]
+        results = await asyncio.gather(
+            *(self.score(message_logs[i], semaphore, rate_limiter) for i in fallback)
+        )
+        for i, analysis in zip(fallback, results):
+            analyses[i] = analysis
+        return analyses
+
+    async def _request(
+        self, message_log, semaphore, rate_limiter, maxToken=None, response_format=None, on_token=None
+    ):
+        # Call the API, respecting the concurrency limit and the per-minute budgets
+        maxToken = maxToken or self.maxToken
+        async with semaphore:
+            for attempt in range(self.MAX_RETRIES + 1):
+                await rate_limiter.acquire(estimate_tokens(message_log, maxToken))
+                try:
+                    return await send_message(
+                        message_log,
+                        maxToken,
+                        model=self.model,
+                        temperature=self.temperature,
+                        api_base=self.api_base,
+                        response_format=response_format,
+                        on_token=on_token,
+                    )
+                except openai.error.RateLimitError:
+                    if attempt == self.MAX_RETRIES:
+                        raise
+                    # Back off exponentially before trying again
+                    await asyncio.sleep(2**attempt)
+
+    async def score_all(self, message_logs, on_result=None, on_token=None):
+        # Score every message log concurrently and return the analyses in input order.
+        # on_result(index, analysis) is called as soon as each analysis completes.
+        analyses = [None] * len(message_logs)
+
+        def collect(index, analysis):
+            analyses[index] = analysis
+            if on_result is not None:
+                on_result(index, analysis)
+
+        await self.score_stream(message_logs, collect, on_token)
+        return analyses
+
+    async def score_stream(self, message_logs, on_result, on_token=None):
+        # Score an iterable of message logs lazily, keeping only a bounded window of requests
+        # in flight so memory stays flat however long the input is. Results are delivered
+        # through on_result(index, analysis) in completion order and are not retained.
+        # With on_token(index, text), single-idea answers are also streamed while they are
+        # written; batched requests are JSON and only arrive whole.
+        semaphore = asyncio.Semaphore(self.concurrency)
+        rate_limiter = RateLimiter(self.requests_per_minute, self.tokens_per_minute)
+        window = self.concurrency * 2  # Keep the next requests ready while others are in flight
+        in_flight = set()
+
+        async def score_group(group):
+            if len(group) == 1:
+                index, message_log = group[0]
+                stream = (lambda text: on_token(index, text)) if on_token is not None else None
+                on_result(index, await self.score(message_log, semaphore, rate_limiter, stream))
+                return
+            analyses = await self.score_batch(
+                [message_log for _, message_log in group], semaphore, rate_limiter
+            )
+            for (index, _), analysis in zip(group, analyses):
+                on_result(index, analysis)
+
+        async def launch(group):
+            nonlocal in_flight
+            if len(in_flight) >= window:
+                done, in_flight = await asyncio.wait(
+                    in_flight, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    task.result()  # Re-raise a failed request
+            in_flight.add(asyncio.create_task(score_group(group)))
+
+        group = []
+        for index, message_log in enumerate(message_logs):
+            group.append((index, message_log))
+            if len(group) == self.batch_size:
+                await launch(group)
+                group = []
+        if group:
+            await launch(group)
+
+        if in_flight:
+            done, _ = await asyncio.wait(in_flight)
+            for task in done:
+                task.result()
+
+    def run(self, message_logs, on_result=None, on_token=None):
+        # Blocking wrapper for callers without an event loop (e.g. the Streamlit script)
+        return asyncio.run(self.score_all(message_logs, on_result, on_token))
+
+    def run_stream(self, message_logs, on_result):
+        # Blocking wrapper around score_stream
+        asyncio.run(self.score_stream(message_logs, on_result))
+
+
+# Example usage: benchmark the engine offline against the local mock server
+if __name__ == "__main__":
+    import pandas as pd
+    from mock_openai_server import start_mock_server
+
+    server, api_base = start_mock_server(latency=0.5)
+    openai.api_key = "sk-mock"
+
+    df = pd.read_csv("AI EarthHack Dataset.csv", encoding="ISO-8859-1").dropna()
+    system_prompt = build_system_prompt("", "Concise bullet points", "Environmental impact, economic viability, scalability")
+    message_logs = [
+        build_message_log(row["problem"], row["solution"], system_prompt)
+        for _, row in df.head(200).iterrows()
+    ]
+
+    for concurrency in [1, 8, 32]:
+        engine = ScoringEngine(concurrency=concurrency, api_base=api_base)
+        logs = message_logs[: 20 * concurrency]
+        start = time.time()
+        analyses = engine.run(logs)
+        end = time.time()
+        print(
+            f"Concurrency {concurrency}: {len(analyses)} ideas in {end - start:.2f}s ({len(analyses) / (end - start):.1f} ideas/s)"
+        )
+
+    server.shutdown()
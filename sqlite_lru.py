@@ -0,0 +1,71 @@
+class SqliteLRU:
+    def __init__(self, conn, table, key_column, max_bytes):
+        """
+        Size-bounded LRU bookkeeping for a SQLite cache table with a key column plus size and
+        last_access columns. The total size is kept as a running count, so storing an entry
+        costs one indexed lookup instead of a SUM over the table; the real SUM is only taken
+        once the count passes max_bytes (another process may have stored or evicted entries
+        since). The caller owns the connection, its locking and its commits.
+        """
+        self.conn = conn
+        self.table = table
+        self.key_column = key_column
+        self.max_bytes = max_bytes
+        self.total = self._sum()
+
+    def _sum(self):
+        return self.conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.table}").fetchone()[0]
+
+    def put(self, row):
+        # Insert or replace a row (a dict of column values, including size), then evict the least
+        # recently used rows if the table is too big
+        key = row[self.key_column]
+        old = self.conn.execute(
+            f"SELECT size FROM {self.table} WHERE {self.key_column} = ?", (key,)
+        ).fetchone()
+        self.conn.execute(
+            f"INSERT OR REPLACE INTO {self.table} ({', '.join(row)}) VALUES ({', '.join('?' * len(row))})",
+            tuple(row.values()),
+        )
+        self.total += row["size"] - (old[0] if old else 0)
+        if self.total > self.max_bytes:
+            self._evict()
+
+    def _evict(self):
+        self.total = self._sum()
+        if self.total <= self.max_bytes:
+            return
+        # Walk rows from least to most recently used until enough space is freed
+        evicted = []
+        for key, size in self.conn.execute(
+            f"SELECT {self.key_column}, size FROM {self.table} ORDER BY last_access"
+        ):
+            if self.total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            self.total -= size
+        self.conn.executemany(f"DELETE FROM {self.table} WHERE {self.key_column} = ?", evicted)
+
+    def clear(self):
+        self.conn.execute(f"DELETE FROM {self.table}")
+        self.total = 0
+
+
+# Example usage: the running total matches the table through replaces, evictions and clears
+if __name__ == "__main__":
+    import sqlite3
+    import time
+
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE entries (key TEXT PRIMARY KEY, value TEXT, size INTEGER, last_access REAL)")
+    lru = SqliteLRU(conn, "entries", "key", max_bytes=1000)
+    start = time.time()
+    for i in range(20_000):
+        value = "x" * (i % 97)
+        lru.put({"key": f"k{i % 300}", "value": value, "size": len(value), "last_access": i})
+        assert lru.total == conn.execute("SELECT SUM(size) FROM entries").fetchone()[0] <= 1000
+    print(f"20000 puts in {time.time() - start:.2f}s, {lru.total} bytes in {conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0]} entries")
+    # The most recently used entries are the ones kept
+    assert conn.execute("SELECT MIN(last_access) FROM entries").fetchone()[0] > 19_000
+    lru.clear()
+    assert lru.total == 0
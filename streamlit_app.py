@@ -1,33 +1,105 @@
-import asyncio
+import time
+from collections import deque
 import streamlit as st
+import numpy as np
 import pandas as pd
 import openai
 from decouple import config
+from analysis_cache import AnalysisCache
+from checkpoint import RunCheckpoint
+from dedup import duplicate_analysis, find_near_duplicates
+from prefilter import PreFilter, prefilter_analysis
+from prior_art import NEIGHBOURS, PriorArtIndex, format_prior_art, prior_art_summary
+from verdict import parse_partial_verdict, parse_verdicts
+from scoring_engine import (
+    FILTER_PROMPTS,
+    MODEL_NAME,
+    ScoringEngine,
+    build_message_log,
+    build_system_prompt,
+    parse_is_filtered,
+)
 
 # Set up your OpenAI API key
 openai.api_key = config("OPENAI_API_KEY")
 
 
-# Function to send a message to the OpenAI chatbot model and return its response
-async def send_message(message_log, maxToken):
-    print(message_log)
+PAGE_SIZE = 20  # Idea cards shown per page of results
+STREAM_REFRESH = 0.1  # Seconds between redraws of a card whose analysis is being streamed
 
-    # Use OpenAI's ChatCompletion API to get the chatbot's response
-    response = openai.ChatCompletion.create(
-        model="gpt-3.5-turbo-1106",  # The name of the OpenAI chatbot model to use
-        messages=message_log,  # The conversation history up to this point, as a list of dictionaries
-        max_tokens=maxToken,  # The maximum number of tokens (words or subwords) in the generated response
-        stop=None,  # The stopping sequence for the generated response, if any (not used here)
-        temperature=0.7,  # The "creativity" of the generated response (higher temperature = more creative)
+
+@st.cache_resource
+def load_icon(path):
+    # Read each verdict icon from disk once per server process
+    with open(path, "rb") as file:
+        return file.read()
+
+
+@st.cache_resource
+def load_prior_art_index():
+    # One prior-art index per server process, so its postings are not rebuilt on every run
+    return PriorArtIndex()
+
+
+def render_card(idx, row):
+    # One expandable card with the full idea and its analysis
+    icon = "✅" if row["isFiltered"] == "Keep" else "❌"
+    score_label = "?" if np.isnan(row["swiftScore"]) else f"{row['swiftScore']:.0f}"
+    card = st.expander(
+        f"#{idx + 1} - {icon} - {score_label}/100 - Problem: {row['problem'][:80]}...",
+        expanded=False,
+    )
+    with card:
+        st.write("Full Problem:")
+        st.write(row["problem"])
+        st.write("Full Solution:")
+        st.write(row["solution"])
+
+        # Display the result and icons
+        st.write("Analysis Result:")
+        if row["isFiltered"] == "Keep":
+            st.image(
+                load_icon("green-checkmark.png"),
+                caption="Analysis Result: Keep Idea",
+                width=200,
+            )
+        else:
+            st.image(
+                load_icon("red-x.png"),
+                caption="Analysis Result: Filter Out Idea",
+                width=200,
+            )
+        st.write(row["analysis"])
+        if row.get("prior_art"):
+            st.write("Similar earlier ideas: " + row["prior_art"])
+
+
+def show_results(df):
+    # Paginated results over a single frame; each choice is a filtered view, not a stored copy
+    view = st.radio(
+        "Show",
+        ["All Ideas", "Remaining Ideas", "Removed Ideas"],
+        horizontal=True,
     )
+    sort_by_score = st.checkbox("Sort by SWIFT score", value=False)
 
-    # Find the first response from the chatbot that has text in it (some responses may not have text)
-    for choice in response.choices:
-        if "text" in choice:
-            return choice.text
+    if view == "Remaining Ideas":
+        mask = df["isFiltered"] == "Keep"
+    elif view == "Removed Ideas":
+        mask = df["isFiltered"] == "Filter"
+    else:
+        mask = df["isFiltered"] != ""
+    ideas = df[mask]
+    if sort_by_score:
+        ideas = ideas.sort_values("swiftScore", ascending=False)
 
-    # If no response with text is found, return the first response's content (which may be empty)
-    return response.choices[0].message.content
+    st.subheader(f"{view} ({len(ideas)})")
+    pages = max(1, -(-len(ideas) // PAGE_SIZE))
+    page = st.number_input("Page", value=1, step=1, min_value=1, max_value=pages)
+    for idx, row in ideas.iloc[(page - 1) * PAGE_SIZE : page * PAGE_SIZE].iterrows():
+        render_card(idx, row)
+
+    st.dataframe(ideas)
 
 
 # Streamlit app
@@ -41,8 +113,6 @@ def main():
         type=["csv"],
     )
 
-    filter_prompt = ""
-
     filter_level = st.sidebar.selectbox(
         "Select Filtering Level:",
         ["Loose Filter", "Normal Filter", "Strict Filter"],
@@ -51,12 +121,11 @@ def main():
 
     if filter_level == "Loose Filter":
         st.sidebar.write("You selected a loose filter where most ideas will pass.")
-        filter_prompt = "Be a loose filter where most ideas will pass."
     elif filter_level == "Normal Filter":
         st.sidebar.write("You selected a normal filter.")
     elif filter_level == "Strict Filter":
         st.sidebar.write("You selected a strict filter.")
-        filter_prompt = "Be an extremely strict filter where very little ideas will pass and you are super critical of all aspects of an idea such the business model and whether an existing solution already exists."
+    filter_prompt = FILTER_PROMPTS[filter_level]
 
     formatting = st.sidebar.text_input("Analysis Delivery Format", "Concise bullet points")
 
@@ -73,6 +142,42 @@ def main():
         max_value=1000,
     )
 
+    # Number of ideas sent to the API at the same time
+    concurrency = st.sidebar.number_input(
+        "Parallel API calls",
+        value=8,
+        step=1,
+        min_value=1,
+        max_value=64,
+    )
+
+    # Pack several ideas into one request to share the system prompt
+    batch_size = st.sidebar.number_input(
+        "Ideas per API call",
+        value=1,
+        step=1,
+        min_value=1,
+        max_value=10,
+    )
+
+    # Reuse analyses from previous runs with identical settings
+    use_cache = st.sidebar.checkbox("Reuse cached analyses", value=True)
+
+    # Continue an interrupted run instead of starting over
+    resume = st.sidebar.checkbox("Resume previous run", value=True)
+
+    # Reject obviously sloppy, off-topic or duplicate ideas without an API call
+    prefilter = st.sidebar.checkbox("Pre-filter obvious rejects locally", value=False)
+
+    # Score one idea per group of near-duplicates and copy its verdict to the rest
+    dedup = st.sidebar.checkbox("Score near-duplicates once", value=False)
+
+    # Show the model the most similar ideas submitted before (this or earlier uploads)
+    prior_art = st.sidebar.checkbox("Compare with earlier ideas", value=False)
+
+    # Show each analysis while it is being written (only for one idea per API call)
+    stream = st.sidebar.checkbox("Stream analyses as they are written", value=True)
+
     if uploaded_file is not None:
         df = pd.read_csv(uploaded_file, encoding="ISO-8859-1")
 
@@ -99,8 +204,10 @@ def main():
             max_value=df[df.columns[0]].count(),
         )
 
+        # The engine caps the batch size so every idea keeps maxToken of completion
+        ideas_per_call = ScoringEngine.effective_batch_size(batch_size, maxToken)
         if st.button(
-            f"Proceed with the uploaded CSV file? It will require {min(threshold, df[df.columns[0]].count())} API calls. Estimated time: {min(threshold, df[df.columns[0]].count()) * 3} seconds."
+            f"Proceed with the uploaded CSV file? It will require {-(-min(threshold, df[df.columns[0]].count()) // ideas_per_call)} API calls. Estimated time: {-(-min(threshold, df[df.columns[0]].count()) // (concurrency * ideas_per_call)) * 3} seconds."
         ):
             st.success("Processing right now!")
             gif_url = "https://i.giphy.com/o0vwzuFwCGAFO.webp"  # Replace with your GIF URL
@@ -109,90 +216,199 @@ def main():
             df["isFiltered"] = ""
             df["analysis"] = ""
 
-            # Display problem-solution pairs as cards in a flexible grid
+            # Collect the rows to analyse, skipping empty problems
+            system_prompt = build_system_prompt(filter_prompt, formatting, criterias)
+            rows = []
             for idx, row in df.iterrows():
                 if idx >= threshold:
                     break
                 if type(row["problem"]) is float or row["problem"] == "":
                     continue
-                truncated_problem = row["problem"][:80] + "..."
-                truncated_solution = row["solution"][:100] + "..."
-
-                # Send the message to OpenAI for analysis
-                analysis = asyncio.run(
-                    send_message(
-                        [
-                            {
-                                "role": "system",
-                                "content": f"You are an expert in sustainability and are very selective about which circular economy ideas will work, given most fail due to there being pre-existing solutions, economic inviability, inability to scale, and technological and business risks. You will receive a problem followed by a solution. Only approve ideas that are meticulously and professionally crafted, well-articulated, and hold tangible relevance. Filtering strictness: {filter_prompt}. In separate lines, mention 3 points. Point 1 - Filter Out Yes or No. Remove if the idea if any of the following applies: sloppy (short length e.g. less than 3 sentences), off-topic (i.e., not sustainability related), unsuitable, or vague (such as the over-generic content that prioritizes form over substance, offering generalities instead of specific details) and if it doesn't clearly specify how it addresses all the evaluation criterias listed below. Return either (Yes - remove idea.) if it falls under one of those categories or (No - keep idea.) if it does not. Point 2 - SWIFT Score: a SWIFT score out of 100 as to whether to filter out the idea (100 - keep, 0 - filter out). This should align with point 1. Point 3 - Analysis Explanation: {formatting} supporting whether to keep or remove the idea from 1. Evaluate on the following criterias: {criterias}. Finally, write a one sentence conclusion that explains why the idea is filtered out and the filter score using the criterias listed. Output format: In separate lines, mention the 3 points: 1. Filter Out: Yes or No. 2. SWIFT Score: Out of 100. 3. Analysis Explanation: 4. Conclusion:",
-                            },
-                            {
-                                "role": "assistant",
-                                "content": "Problem: "
-                                + row["problem"]
-                                + "\n Solution: "
-                                + row["solution"],
-                            },
-                        ],
-                        maxToken,
-                    )
+                rows.append((idx, row))
+
+            # Every idea is indexed as prior art for the ideas after it
+            neighbours = [[] for _ in rows]
+            if prior_art and rows:
+                prior_art_index = load_prior_art_index()
+                problems = [row["problem"] for _, row in rows]
+                solutions = [row["solution"] if type(row["solution"]) is str else "" for _, row in rows]
+                positions = prior_art_index.add_many(
+                    [row.get("id", idx) for idx, row in rows], problems, solutions
+                )
+                neighbours = prior_art_index.neighbours_many(problems, solutions, positions)
+
+            # Rows already scored with this configuration are restored from the checkpoint
+            run_config = {
+                "system_prompt": system_prompt,
+                "model": MODEL_NAME,
+                "temperature": 0.7,
+                "maxToken": maxToken,
+            }
+            if prior_art:
+                run_config["prior_art"] = NEIGHBOURS
+            checkpoint = RunCheckpoint(run_config)
+            if not resume:
+                checkpoint.reset()
+            finished = checkpoint.load()
+            row_keys = [
+                RunCheckpoint.row_key(row.get("id", idx), row["problem"], row["solution"])
+                for idx, row in rows
+            ]
+            analyses = [
+                finished[key]["analysis"] if key in finished else None
+                for key in row_keys
+            ]
+            restored = sum(analysis is not None for analysis in analyses)
+            if restored:
+                st.info(f"Resuming: {restored} ideas restored from the last run.")
+            rejected = [False] * len(rows)
+            if prefilter and rows:
+                reasons = PreFilter(check_duplicates=not dedup).apply(
+                    df.loc[[idx for idx, _ in rows]]
+                )
+                rejected = (reasons != "").tolist()
+                for i, reason in enumerate(reasons):
+                    if reason and analyses[i] is None:
+                        analyses[i] = prefilter_analysis(reason)
+            # Near-duplicates point at the position of their representative in rows; pre-filter
+            # rejects are left out of the groups, as in the CLI
+            duplicate_of = [None] * len(rows)
+            if dedup and rows:
+                duplicate_of = find_near_duplicates(
+                    df.loc[[idx for idx, _ in rows]], exclude=rejected
+                ).tolist()
+            pending = [
+                i
+                for i, analysis in enumerate(analyses)
+                if analysis is None and duplicate_of[i] is None
+            ]
+
+            # Send the remaining messages to OpenAI for analysis concurrently
+            progress = st.progress(0)
+            streaming = stream and ideas_per_call == 1
+            # One card per request in flight, reused by the next idea once its analysis is done
+            live_cards = [st.empty() for _ in range(min(concurrency, len(pending)) if streaming else 0)]
+            free_cards = list(range(len(live_cards)))
+            card_of = {}  # Pending index -> live card
+            last_drawn = {}  # Pending index -> (time, verdict) of its last redraw
+            live_results = st.empty()
+            recent = deque(maxlen=10)  # Latest finished ideas, newest first
+            completed = []
+
+            def on_token(index, text):
+                # Redraw the idea's card with the analysis so far, at most every STREAM_REFRESH
+                # seconds, and at once when its "Filter Out" verdict arrives
+                verdict = parse_partial_verdict(text)
+                now = time.monotonic()
+                drawn = last_drawn.get(index)
+                if drawn is not None and drawn[1] == verdict and now - drawn[0] < STREAM_REFRESH:
+                    return
+                if index not in card_of:
+                    if not free_cards:
+                        return
+                    card_of[index] = free_cards.pop()
+                last_drawn[index] = (now, verdict)
+                idx, row = rows[pending[index]]
+                icon = {"Keep": "✅", "Filter": "❌"}.get(verdict, "⏳")
+                live_cards[card_of[index]].markdown(
+                    f"**{icon} #{idx + 1} - Problem: {row['problem'][:80]}...**\n\n{text}"
                 )
 
-                df.at[idx, "analysis"] = analysis
-
-                # Determine if the idea should be filtered
-                if "yes" in analysis.lower():
-                    df.at[idx, "isFiltered"] = "Filter"
-                else:
-                    df.at[idx, "isFiltered"] = "Keep"
-
-                icon = "❌"
-
-                if df.at[idx, "isFiltered"] == "Keep":
-                    icon = "✅"
-
-                card = st.expander(
-                    f"#{idx + 1} - {icon} - Problem: {truncated_problem}",
-                    expanded=False,
+            def on_result(index, analysis):
+                # Persist each analysis as soon as it arrives
+                i = pending[index]
+                idx, row = rows[i]
+                is_filtered = parse_is_filtered(analysis)
+                checkpoint.record(
+                    row_keys[i],
+                    id=str(row.get("id", idx)),
+                    isFiltered=is_filtered,
+                    analysis=analysis,
                 )
-                with card:
-                    st.write("Full Problem:")
-                    st.write(row["problem"])
-                    st.write("Full Solution:")
-                    st.write(row["solution"])
-
-                    # Display the result and icons
-                    st.write("Analysis Result:")
-                    if df.at[idx, "isFiltered"] == "Keep":
-                        st.image(
-                            "green-checkmark.png",
-                            caption="Analysis Result: Keep Idea",
-                            width=200,
-                        )
-                    else:
-                        st.image(
-                            "red-x.png",
-                            caption="Analysis Result: Filter Out Idea",
-                            width=200,
+                completed.append(index)
+                progress.progress(len(completed) / len(pending))
+                if index in card_of:
+                    live_cards[card_of[index]].empty()
+                    free_cards.append(card_of.pop(index))
+                last_drawn.pop(index, None)
+
+                # Stream a one-line summary instead of rebuilding the result cards
+                icon = "✅" if is_filtered == "Keep" else "❌"
+                recent.appendleft(f"{icon} #{idx + 1} - Problem: {row['problem'][:80]}...")
+                live_results.markdown("\n\n".join(recent))
+
+            cache = AnalysisCache() if use_cache else None
+            engine = ScoringEngine(
+                maxToken=maxToken,
+                concurrency=concurrency,
+                cache=cache,
+                batch_size=batch_size,
+            )
+            try:
+                results = engine.run(
+                    [
+                        build_message_log(
+                            rows[i][1]["problem"],
+                            rows[i][1]["solution"],
+                            system_prompt,
+                            format_prior_art(neighbours[i]),
                         )
-                    st.write(analysis)
-
-            # Allow filtering based on whether an idea is filtered or not
-            filtered_ideas = df[df["isFiltered"] == "Filter"]
-            st.subheader("Removed Ideas")
-            st.dataframe(filtered_ideas)
-
-            # Allow filtering based on whether an idea is filtered or not
-            keep_ideas = df[df["isFiltered"] == "Keep"]
-            st.subheader("Remaining Ideas")
-            st.dataframe(keep_ideas)
+                        for i in pending
+                    ],
+                    on_result,
+                    on_token if streaming else None,
+                )
+            except Exception as e:
+                st.error(
+                    f"Stopped after {len(completed)} of {len(pending)} ideas: {e}. Finished analyses are saved; press the button again to resume."
+                )
+                st.stop()
+            finally:
+                checkpoint.close()
+                if cache is not None:
+                    stats = cache.stats()
+                    st.sidebar.info(
+                        f"Analysis cache: {stats['hits']} hits, {stats['misses']} misses ({stats['entries']} cached analyses)."
+                    )
+                    cache.close()
+            for i, analysis in zip(pending, results):
+                analyses[i] = analysis
+
+            # Near-duplicates copy the verdict of their representative
+            df["duplicate_of"] = ""
+            if dedup:
+                for i, representative in enumerate(duplicate_of):
+                    if representative is not None:
+                        representative_idx, representative_row = rows[representative]
+                        representative_id = str(representative_row.get("id", representative_idx))
+                        df.at[rows[i][0], "duplicate_of"] = representative_id
+                        if analyses[i] is None:
+                            analyses[i] = duplicate_analysis(representative_id, analyses[representative])
+
+            # Split every analysis into typed verdict columns in one pass
+            scored = [idx for idx, _ in rows]
+            df["swiftScore"] = np.nan
+            df["conclusion"] = ""
+            df["prior_art"] = ""
+            if rows:
+                df.loc[scored, "prior_art"] = [prior_art_summary(found) for found in neighbours]
+                df.loc[scored, "analysis"] = analyses
+                verdicts = parse_verdicts(df.loc[scored, "analysis"])
+                for column in ["isFiltered", "swiftScore", "conclusion"]:
+                    df.loc[scored, column] = verdicts[column]
+
+            live_results.empty()
+            for live_card in live_cards:
+                live_card.empty()
+            gif_url = "https://i.giphy.com/3LMuVfcoGXOV2OO51k.webp"  # Replace with your GIF URL
+            st.image(gif_url)
 
-            all_ideas = df[df["id"] != None]
-            st.subheader("All Ideas")
-            st.dataframe(all_ideas)
+            # Keep the results across reruns so paging through them does not score again
+            st.session_state["results"] = df
+            st.session_state["results_file"] = uploaded_file.name
 
-            gif_url = "https://i.giphy.com/3LMuVfcoGXOV2OO51k.webp"  # Replace with your GIF URL
-            st.image(gif_url)   
+        if st.session_state.get("results_file") == uploaded_file.name:
+            show_results(st.session_state["results"])
 
         # # Export dataframes to CSV files
         # if st.button("Export Removed Ideas as CSV"):
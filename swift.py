@@ -0,0 +1,338 @@
+import argparse
+import csv
+import itertools
+import json
+import math
+import os
+import sys
+import time
+import openai
+import pandas as pd
+from decouple import config
+from analysis_cache import AnalysisCache
+from checkpoint import RunCheckpoint
+from ingest import iter_idea_chunks, missing_columns
+from dedup import NearDuplicateGroups, duplicate_analysis
+from prefilter import PreFilter, prefilter_analysis
+from prior_art import PriorArtIndex, format_prior_art, prior_art_summary
+from scoring_engine import (
+    FILTER_PROMPTS,
+    MODEL_NAME,
+    ScoringEngine,
+    build_message_log,
+    build_system_prompt,
+)
+from verdict import parse_verdict
+
+# Command line names for the filtering levels offered in the Streamlit sidebar
+FILTER_LEVELS = {
+    "loose": "Loose Filter",
+    "normal": "Normal Filter",
+    "strict": "Strict Filter",
+}
+
+OUTPUT_FIELDS = [
+    "id",
+    "problem",
+    "solution",
+    "isFiltered",
+    "swiftScore",
+    "analysisExplanation",
+    "conclusion",
+    "analysis",
+    "duplicate_of",
+    "prior_art",
+]
+
+
+class ResultWriter:
+    def __init__(self, output_path, output_format=None):
+        # Write results as CSV or JSONL (inferred from the extension); "-" writes to stdout
+        if output_format is None:
+            output_format = "jsonl" if output_path.endswith((".jsonl", ".json")) else "csv"
+        self.output_format = output_format
+        if output_path == "-":
+            self.file = sys.stdout
+        else:
+            self.file = open(output_path, "w", encoding="utf-8", newline="")
+        self.csv_writer = None
+        if output_format == "csv":
+            self.csv_writer = csv.DictWriter(self.file, fieldnames=OUTPUT_FIELDS)
+            self.csv_writer.writeheader()
+
+    def write(self, record):
+        # Stream one row to the output as soon as it is available
+        if self.csv_writer is not None:
+            self.csv_writer.writerow(record)
+        else:
+            self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.file.flush()
+
+    def close(self):
+        if self.file is not sys.stdout:
+            self.file.close()
+
+
+def filter_csv(
+    input_path,
+    output_path,
+    level="normal",
+    formatting="Concise bullet points",
+    criterias="Environmental impact, economic viability, scalability",
+    maxToken=300,
+    concurrency=8,
+    requests_per_minute=None,
+    tokens_per_minute=None,
+    limit=None,
+    use_cache=True,
+    resume=True,
+    api_base=None,
+    output_format=None,
+    chunksize=1000,
+    prefilter=False,
+    dedup=False,
+    dedup_threshold=0.8,
+    batch_size=1,
+    prior_art=0,
+):
+    """
+    Runs the SWIFT filter over an id,problem,solution CSV and streams every result to
+    output_path in completion order. The CSV is read chunksize rows at a time, so memory
+    stays flat for any input size. With prefilter, obvious rejects are filtered locally
+    without an API call. With dedup, only one representative per cluster of near-duplicate
+    ideas is scored and the others copy its verdict. batch_size > 1 packs that many ideas
+    into each request. With prior_art > 0, every idea is added to the persistent prior-art
+    index and up to that many similar earlier ideas are shown to the model and listed in the
+    output. Returns a summary of the run.
+    """
+    # Fail fast on a bad header before any output is written
+    chunks = iter_idea_chunks(input_path, chunksize=chunksize, limit=limit)
+    first = next(chunks, None)
+    if first is not None:
+        chunks = itertools.chain([first], chunks)
+
+    system_prompt = build_system_prompt(
+        FILTER_PROMPTS[FILTER_LEVELS[level]], formatting, criterias
+    )
+    run_config = {
+        "system_prompt": system_prompt,
+        "model": MODEL_NAME,
+        "temperature": 0.7,
+        "maxToken": maxToken,
+    }
+    if prior_art:
+        # Prompts include the neighbours, so these runs are checkpointed separately
+        run_config["prior_art"] = prior_art
+    checkpoint = RunCheckpoint(run_config)
+    if not resume:
+        checkpoint.reset()
+    finished = checkpoint.index()  # Offsets only, so resuming a huge run stays cheap
+
+    def to_record(row, analysis, duplicate_of=""):
+        verdict = parse_verdict(analysis)
+        return {
+            "id": str(row["id"]),
+            "problem": row["problem"],
+            "solution": row["solution"],
+            "isFiltered": verdict["isFiltered"],
+            "swiftScore": None if math.isnan(verdict["swiftScore"]) else verdict["swiftScore"],
+            "analysisExplanation": verdict["analysisExplanation"],
+            "conclusion": verdict["conclusion"],
+            "analysis": analysis,
+            "duplicate_of": duplicate_of,
+            "prior_art": prior_art_summary(row.get("prior_art", [])),
+        }
+
+    writer = ResultWriter(output_path, output_format)
+    cache = AnalysisCache() if use_cache else None
+    counts = {"rows": 0, "restored": 0, "prefiltered": 0, "duplicates": 0, "scored": 0}
+    pre_filter = PreFilter(check_duplicates=not dedup) if prefilter else None
+    duplicate_groups = NearDuplicateGroups(threshold=dedup_threshold) if dedup else None
+    prior_art_index = PriorArtIndex() if prior_art else None
+    representative_analyses = {}  # Representative row position -> (id, analysis), once known
+    waiting_duplicates = {}  # Representative row position -> near-duplicates waiting for its verdict
+    in_flight = {}  # Rows sent to the engine and not yet answered, by engine index
+    start = time.time()
+
+    def ideas():
+        # Rows that pass the optional local pre-filter, one at a time
+        for chunk in chunks:
+            reasons = pre_filter.apply(chunk) if pre_filter is not None else None
+            neighbours = None
+            if prior_art_index is not None:
+                # Every submitted idea becomes prior art for the ideas after it
+                positions = prior_art_index.add_many(chunk["id"], chunk["problem"], chunk["solution"])
+                neighbours = prior_art_index.neighbours_many(
+                    chunk["problem"], chunk["solution"], positions, k=prior_art
+                )
+            for i, row in enumerate(chunk.to_dict("records")):
+                row["position"] = counts["rows"]  # Position in the input, unique even if ids repeat
+                counts["rows"] += 1
+                if neighbours is not None:
+                    row["prior_art"] = neighbours[i]
+                if reasons is not None and reasons.iat[i]:
+                    # Obvious rejects never reach the API
+                    writer.write(to_record(row, prefilter_analysis(reasons.iat[i])))
+                    counts["prefiltered"] += 1
+                    continue
+                if duplicate_groups is not None:
+                    representative = duplicate_groups.add(row["position"], row["problem"], row["solution"])
+                    if representative is not None:
+                        # Near-duplicates reuse their representative's verdict
+                        counts["duplicates"] += 1
+                        if representative in representative_analyses:
+                            write_duplicate(row, representative)
+                        else:
+                            waiting_duplicates.setdefault(representative, []).append(row)
+                        continue
+                yield row
+
+    def write_duplicate(row, representative):
+        representative_id, analysis = representative_analyses[representative]
+        analysis = duplicate_analysis(representative_id, analysis)
+        writer.write(to_record(row, analysis, duplicate_of=representative_id))
+
+    def write_scored(row, analysis):
+        # Write a scored row and release any near-duplicates waiting for it
+        writer.write(to_record(row, analysis))
+        if duplicate_groups is not None:
+            representative_analyses[row["position"]] = (str(row["id"]), analysis)
+            for duplicate in waiting_duplicates.pop(row["position"], []):
+                write_duplicate(duplicate, row["position"])
+
+    def pending_message_logs():
+        # Feed rows straight from the CSV reader to the engine, writing restored rows on the way
+        for row in ideas():
+            key = RunCheckpoint.row_key(row["id"], row["problem"], row["solution"])
+            if key in finished:
+                write_scored(row, checkpoint.read(finished[key])["analysis"])
+                counts["restored"] += 1
+                continue
+            in_flight[counts["scored"]] = (key, row)
+            counts["scored"] += 1
+            yield build_message_log(
+                row["problem"],
+                row["solution"],
+                system_prompt,
+                format_prior_art(row.get("prior_art", [])),
+            )
+
+    def on_result(index, analysis):
+        # Persist and stream each analysis as soon as it arrives
+        key, row = in_flight.pop(index)
+        record = to_record(row, analysis)
+        checkpoint.record(
+            key, id=record["id"], isFiltered=record["isFiltered"], analysis=analysis
+        )
+        write_scored(row, analysis)
+
+    try:
+        engine = ScoringEngine(
+            maxToken=maxToken,
+            concurrency=concurrency,
+            requests_per_minute=requests_per_minute,
+            tokens_per_minute=tokens_per_minute,
+            api_base=api_base,
+            cache=cache,
+            batch_size=batch_size,
+        )
+        engine.run_stream(pending_message_logs(), on_result)
+    finally:
+        writer.close()
+        checkpoint.close()
+        if cache is not None:
+            cache.close()
+        if prior_art_index is not None:
+            prior_art_index.close()
+
+    summary = {**counts, "seconds": round(time.time() - start, 2)}
+    if cache is not None:
+        summary.update(cache_hits=cache.hits, cache_misses=cache.misses)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="swift",
+        description="SWIFT - Sustainable Workflow for Idea Filtering and Testing",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    filter_parser = subparsers.add_parser(
+        "filter", help="Filter an id,problem,solution CSV without the Streamlit UI"
+    )
+    filter_parser.add_argument("input", help="CSV file with the columns id, problem, solution")
+    filter_parser.add_argument("-o", "--output", required=True, help="Output .csv or .jsonl file, or - for stdout")
+    filter_parser.add_argument("--output-format", choices=["csv", "jsonl"], help="Defaults to the output file extension")
+    filter_parser.add_argument("--level", choices=list(FILTER_LEVELS), default="normal", help="Filtering level")
+    filter_parser.add_argument("--formatting", default="Concise bullet points", help="Analysis delivery format")
+    filter_parser.add_argument("--criterias", default="Environmental impact, economic viability, scalability", help="Evaluation criterias")
+    filter_parser.add_argument("--max-tokens", type=int, default=300, help="Preferred length of analysis")
+    filter_parser.add_argument("--concurrency", type=int, default=8, help="Parallel API calls")
+    filter_parser.add_argument("--batch-size", type=int, default=1, help="Ideas packed into each API call")
+    filter_parser.add_argument("--rpm", type=int, help="Requests per minute budget")
+    filter_parser.add_argument("--tpm", type=int, help="Tokens per minute budget")
+    filter_parser.add_argument("--limit", type=int, help="Number of ideas to process")
+    filter_parser.add_argument("--no-cache", action="store_true", help="Do not reuse cached analyses")
+    filter_parser.add_argument("--no-resume", action="store_true", help="Start over instead of resuming the last run")
+    filter_parser.add_argument("--prefilter", action="store_true", help="Reject obviously sloppy, off-topic or duplicate ideas locally")
+    filter_parser.add_argument("--dedup", action="store_true", help="Score one idea per group of near-duplicates and copy its verdict")
+    filter_parser.add_argument("--dedup-threshold", type=float, default=0.8, help="Estimated Jaccard similarity for near-duplicates")
+    filter_parser.add_argument("--prior-art", type=int, default=0, help="Show the model this many similar earlier ideas (0 = off)")
+    filter_parser.add_argument("--chunksize", type=int, default=1000, help="CSV rows read at a time")
+    filter_parser.add_argument("--api-base", help="Alternative API base URL, e.g. a local mock server")
+
+    args = parser.parse_args(argv)
+
+    # Set up your OpenAI API key
+    openai.api_key = config("OPENAI_API_KEY", default=openai.api_key)
+
+    if args.command == "filter":
+        # Everything that can be wrong with the arguments is checked before any work starts, so
+        # errors raised during the run are reported as such rather than as usage errors
+        if not os.path.exists(args.input):
+            parser.error(f"Input file not found: {args.input}")
+        try:
+            columns = pd.read_csv(args.input, encoding="ISO-8859-1", nrows=0).columns
+        except pd.errors.EmptyDataError:
+            parser.error(f"Input file is empty: {args.input}")
+        missing = missing_columns(columns)
+        if missing:
+            parser.error(f"Invalid CSV: {args.input} does not contain the required columns {missing}")
+        for name in ("max_tokens", "concurrency", "batch_size", "chunksize", "rpm", "tpm"):
+            value = getattr(args, name)
+            if value is not None and value < 1:
+                parser.error(f"--{name.replace('_', '-')} must be at least 1")
+        for name in ("limit", "prior_art"):
+            value = getattr(args, name)
+            if value is not None and value < 0:
+                parser.error(f"--{name.replace('_', '-')} must not be negative")
+        if not 0 < args.dedup_threshold <= 1:
+            parser.error("--dedup-threshold must be in (0, 1]")
+        summary = filter_csv(
+            args.input,
+            args.output,
+            level=args.level,
+            formatting=args.formatting,
+            criterias=args.criterias,
+            maxToken=args.max_tokens,
+            concurrency=args.concurrency,
+            requests_per_minute=args.rpm,
+            tokens_per_minute=args.tpm,
+            limit=args.limit,
+            use_cache=not args.no_cache,
+            resume=not args.no_resume,
+            api_base=args.api_base,
+            output_format=args.output_format,
+            chunksize=args.chunksize,
+            prefilter=args.prefilter,
+            dedup=args.dedup,
+            dedup_threshold=args.dedup_threshold,
+            batch_size=args.batch_size,
+            prior_art=args.prior_art,
+        )
+        print(json.dumps(summary), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import asyncio
+import time
+import aiohttp
+from fetch_web_content import WebContentFetcher
+from retrieval import EmbeddingRetriever
+from llm_answer import GPTAnswer
+from locate_reference import ReferenceLocator
+from serper_service import SerperClient
+from main import OUTPUT_FORMAT, PROFILE
+
+
+class AsyncFactChecker:
+    CONCURRENCY = 8  # Queries in flight at once
+    MAX_CONNECTIONS = 64  # Open page downloads across all queries
+    PER_HOST_LIMIT = 2  # Page downloads from the same host at once (0 = no limit)
+
+    def __init__(
+        self,
+        concurrency=CONCURRENCY,
+        deadline=None,
+        min_results=None,
+        per_host_limit=PER_HOST_LIMIT,
+        serper_url=None,
+        api_base=None,
+        output_format=OUTPUT_FORMAT,
+        profile=PROFILE,
+    ):
+        """
+        Runs search, crawl, embed and answer for many queries on one event loop. Each query is
+        its own task, so crawling for one query overlaps embedding and answering for others.
+        serper_url and api_base point the pipeline at other servers, e.g. local stand-ins.
+        """
+        self.concurrency = concurrency
+        self.deadline = deadline
+        self.min_results = min_results
+        self.per_host_limit = per_host_limit
+        self.output_format = output_format
+        self.profile = profile
+
+        # Config is read once and the clients are shared by every query
+        self.serper_client = SerperClient()
+        self.retriever = EmbeddingRetriever()
+        self.answerer = GPTAnswer()
+        if serper_url:
+            self.serper_client.url = serper_url
+        if api_base:
+            self.retriever.config["openai_api_base"] = api_base
+            self.answerer.api_base = api_base
+
+    async def check(self, query, search_session, page_session):
+        # Run the whole pipeline for one query and return its answer, reference cards and timings
+        timings = {}
+        start = time.time()
+        fetcher = WebContentFetcher(query, self.deadline, self.min_results, self.serper_client)
+        web_contents, serper_response = await fetcher.afetch(page_session, search_session)
+        timings["fetch"] = time.time() - start
+        timings["pages"] = fetcher.timings
+
+        start = time.time()
+        relevant_docs_list = await self.retriever.aretrieve_embeddings(
+            web_contents, serper_response["links"], query
+        )
+        formatted_relevant_docs = self.answerer._format_reference(
+            relevant_docs_list, serper_response["links"]
+        )
+        timings["retrieve"] = time.time() - start
+
+        start = time.time()
+        ai_message_obj = await self.answerer.aget_answer(
+            query,
+            formatted_relevant_docs,
+            serper_response["language"],
+            self.output_format,
+            self.profile,
+        )
+        answer = ai_message_obj.content + "\n"
+        timings["answer"] = time.time() - start
+
+        reference_cards = ReferenceLocator(answer, serper_response, web_contents).locate_source()
+        return {"query": query, "answer": answer, "references": reference_cards, "timings": timings}
+
+    async def check_all(self, queries, on_result=None):
+        """
+        Fact-checks an iterable of queries with at most concurrency in flight. Results are
+        returned in input order and, if on_result is given, also passed to
+        on_result(index, result) as each query finishes. A failed query yields {"query", "error"}.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        connector = aiohttp.TCPConnector(
+            limit=self.MAX_CONNECTIONS, limit_per_host=self.per_host_limit
+        )
+        # Search requests get their own session so the per-host page limit never throttles them
+        async with aiohttp.ClientSession() as search_session, aiohttp.ClientSession(
+            connector=connector
+        ) as page_session:
+
+            async def check_one(index, query):
+                async with semaphore:
+                    try:
+                        result = await self.check(query, search_session, page_session)
+                    except Exception as e:
+                        print(f"Query {index} failed: {e}")
+                        result = {"query": query, "error": str(e)}
+                if on_result is not None:
+                    on_result(index, result)
+                return result
+
+            return await asyncio.gather(
+                *(check_one(index, query) for index, query in enumerate(queries))
+            )
+
+    def run(self, queries, on_result=None):
+        # Blocking wrapper for callers without an event loop
+        return asyncio.run(self.check_all(queries, on_result))
+
+
+# Example usage: python async_pipeline.py --limit 20 --stand-in
+if __name__ == "__main__":
+    import argparse
+    import json
+    import os
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Fact-check an idea dataset against web search")
+    parser.add_argument(
+        "--input", default=os.path.join(os.path.dirname(__file__), "..", "AI EarthHack Dataset.csv")
+    )
+    parser.add_argument("--output", default="fact_checks.jsonl")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=AsyncFactChecker.CONCURRENCY)
+    parser.add_argument(
+        "--stand-in", action="store_true", help="Run against the local mock search/OpenAI server"
+    )
+    parser.add_argument("--latency", type=float, default=0.5, help="Stand-in server latency")
+    parser.add_argument(
+        "--port", type=int, default=0, help="Stand-in server port (fixed ports let re-runs hit the caches)"
+    )
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.input, encoding="ISO-8859-1").dropna().head(args.limit)
+    queries = [
+        f"Problem: {row['problem']}. Solution: {row['solution']}" for _, row in df.iterrows()
+    ]
+
+    options = {"concurrency": args.concurrency}
+    if args.stand_in:
+        from mock_search_server import start_mock_server
+
+        server, search_url, api_base = start_mock_server(port=args.port, latency=args.latency)
+        # Every stand-in page is served from one host, so the per-host limit is lifted
+        options.update(serper_url=search_url, api_base=api_base, per_host_limit=0)
+    checker = AsyncFactChecker(**options)
+
+    with open(args.output, "w", encoding="utf-8") as file:
+
+        def on_result(index, result):
+            file.write(json.dumps({"index": index, **result}, ensure_ascii=False) + "\n")
+            print(f"Query {index} done")
+
+        start = time.time()
+        results = checker.run(queries, on_result)
+        end = time.time()
+
+    failed = sum(1 for result in results if "error" in result)
+    print(
+        f"Fact-checked {len(results)} ideas ({failed} failed) in {end - start:.2f}s "
+        f"with concurrency {args.concurrency}"
+    )
+    if checker.serper_client.cache:
+        print("Search cache:", checker.serper_client.cache.stats())
+    print(
+        f"Embedded {checker.retriever.embedded_chunks} new chunks, "
+        f"reused {checker.retriever.reused_chunks} from the vector store"
+    )
+    if getattr(checker.retriever.embeddings, "cache", None):
+        print("Embedding cache:", checker.retriever.embeddings.cache.stats())
+    statuses = {}
+    for result in results:
+        for card in result.get("references", []):
+            status = card.get("verification", {}).get("status")
+            statuses[status] = statuses.get(status, 0) + 1
+    print("Quoted sentences:", statuses)
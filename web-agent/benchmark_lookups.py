@@ -0,0 +1,75 @@
+import random
+import time
+from langchain.schema import Document
+from fetch_web_content import WebContentFetcher
+from llm_answer import GPTAnswer
+from locate_reference import ReferenceLocator
+
+SIZES = [100, 1000, 10000]
+
+
+def make_serper_response(n):
+    # Search results with n distinct links
+    links = [f"https://example.com/article/{i}" for i in range(n)]
+    return {
+        "query": "benchmark",
+        "language": "en-us",
+        "count": n,
+        "titles": [f"Title {i}" for i in range(n)],
+        "links": links,
+        "snippets": [f"Snippet {i}" for i in range(n)],
+    }
+
+
+def time_fetch_reorder(n):
+    # Reordering n crawled pages (finished in random order) back into search order
+    serper_response = make_serper_response(n)
+    fetcher = WebContentFetcher("benchmark")
+    fetcher._serper_launcher = lambda: serper_response
+    fetcher._crawl_threads_launcher = lambda url_list: None
+    fetcher.web_contents = [{"url": url, "content": url} for url in serper_response["links"]]
+    random.shuffle(fetcher.web_contents)
+    start = time.perf_counter()
+    fetcher.fetch()
+    return time.perf_counter() - start
+
+
+def time_format_reference(n):
+    # Formatting n retrieved chunks that point at n different links
+    serper_response = make_serper_response(n)
+    docs = [Document(page_content=f"Content {i}", metadata={"url": url}) for i, url in enumerate(serper_response["links"])]
+    random.shuffle(docs)
+    answer = GPTAnswer()
+    answer.TOP_K = n
+    answer.context_token_budget = None  # Every chunk is distinct and packed, so all n are looked up
+    start = time.perf_counter()
+    answer._format_reference(docs, serper_response["links"])
+    return time.perf_counter() - start
+
+
+def time_locate_source(n):
+    # Locating n cited sentences against n references and n search results
+    serper_response = make_serper_response(n)
+    content = "".join(f"\nFact number {i} is stated here [{i + 1}]." for i in range(n))
+    references = "".join(
+        f"[{i + 1}] URL: {serper_response['links'][i]}\n    Quoted sentence: Quote {i}.\n" for i in range(n)
+    )
+    locator = ReferenceLocator(content + "\nReferences:\n" + references, serper_response)
+    start = time.perf_counter()
+    cards = locator.locate_source()
+    elapsed = time.perf_counter() - start
+    assert len(cards) == n
+    return elapsed
+
+
+# Example usage: python benchmark_lookups.py
+if __name__ == "__main__":
+    random.seed(0)
+    for name, benchmark in [
+        ("fetch reorder", time_fetch_reorder),
+        ("format reference", time_format_reference),
+        ("locate source", time_locate_source),
+    ]:
+        for n in SIZES:
+            elapsed = benchmark(n)
+            print(f"{name:>16} n={n:>6}: {elapsed * 1000:8.2f} ms ({elapsed / n * 1e6:.2f} us per item)")
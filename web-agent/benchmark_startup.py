@@ -0,0 +1,63 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+MODULES = ["serper_service", "fetch_web_content", "retrieval", "llm_answer", "main"]
+RUNS = 5
+QUERIES = 20
+WEB_AGENT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def time_import(module):
+    # Median wall time to import module in a fresh interpreter, minus the interpreter itself
+    def run(statement):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", statement], check=True, cwd=WEB_AGENT_DIR)
+        return time.perf_counter() - start
+
+    baseline = statistics.median(run("pass") for _ in range(RUNS))
+    return statistics.median(run(f"import {module}") for _ in range(RUNS)) - baseline
+
+
+def time_query_setup(shared):
+    """
+    Seconds to set up the clients of one query: search client, retriever with its text splitter,
+    answerer with its chat model and prompt. The first query pays for the lazy imports; later
+    ones only for the clients, which the registry shares across queries.
+    """
+    from llm_answer import GPTAnswer
+    from registry import get_answerer, get_chat_model, get_retriever, get_serper_client
+    from retrieval import EmbeddingRetriever
+    from serper_service import SerperClient
+
+    timings = []
+    for _ in range(QUERIES):
+        start = time.perf_counter()
+        if shared:
+            serper_client, retriever, answerer = get_serper_client(), get_retriever(), get_answerer()
+        else:
+            serper_client, retriever, answerer = SerperClient(), EmbeddingRetriever(), GPTAnswer()
+        retriever._get_text_splitter()
+        get_chat_model(answerer.model_name, answerer.api_key, answerer.api_base)
+        answerer._build_prompt("query", "context", "en-us", "", "")
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+# Example usage: python benchmark_startup.py (needs config/config.yaml; makes no network calls)
+if __name__ == "__main__":
+    for module in MODULES:
+        print(f"import {module:>18}: {time_import(module) * 1000:7.1f} ms")
+
+    for shared in [False, True]:
+        # Each mode runs in a fresh interpreter, so both pay the lazy imports on their first query
+        label = "shared registry" if shared else "fresh clients"
+        command = f"import benchmark_startup, json; print(json.dumps(benchmark_startup.time_query_setup({shared})))"
+        timings = json.loads(subprocess.run([sys.executable, "-c", command], check=True, capture_output=True, text=True, cwd=WEB_AGENT_DIR).stdout)
+        print(
+            f"{label:>15}: first query {timings[0] * 1000:7.1f} ms, "
+            f"then {statistics.median(timings[1:]) * 1000:6.2f} ms per query"
+        )
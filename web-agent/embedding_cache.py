@@ -0,0 +1,283 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import numpy as np
+
+DEFAULT_CACHE_DIRECTORY = os.path.join(os.path.dirname(__file__), ".swift_cache", "embeddings")
+SQL_BATCH = 500  # Keys per IN (...) query, below SQLite's parameter limit
+RESERVATION_TIMEOUT = 60.0  # Seconds after which rows reserved by a crashed writer are reused
+
+
+class EmbeddingCache:
+    def __init__(self, directory, dim=None, max_rows=100_000):
+        """
+        Embedding vectors stored as rows of one float32 memory-mapped file, with a SQLite index
+        from text hash to row. Processes that open the same directory share the vectors through
+        the OS page cache; a lookup copies only the requested rows. Once max_rows are in use, the
+        least recently used rows are overwritten. dim and max_rows are fixed when the cache is
+        created; dim may be omitted to open an existing cache.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+        # Autocommit mode: transactions are opened explicitly with BEGIN IMMEDIATE
+        self.conn = sqlite3.connect(
+            os.path.join(directory, "index.sqlite"),
+            timeout=30,
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER)")
+        # A row with a NULL key is free, or reserved by a writer that is filling it in
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS rows ("
+            "row INTEGER PRIMARY KEY, key TEXT UNIQUE, last_access REAL, reserved REAL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS rows_last_access ON rows (last_access)")
+
+        path = os.path.join(directory, "vectors.f32")
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            meta = dict(self.conn.execute("SELECT name, value FROM meta"))
+            if not meta:
+                if dim is None:
+                    raise ValueError(f"No embedding cache in {directory}; pass dim to create one")
+                meta = {"dim": int(dim), "max_rows": int(max_rows)}
+                self.conn.executemany("INSERT INTO meta VALUES (?, ?)", meta.items())
+                # A sparse file: disk space is only used by the rows actually written
+                with open(path, "ab") as file:
+                    file.truncate(meta["dim"] * meta["max_rows"] * 4)
+            elif dim is not None and int(dim) != meta["dim"]:
+                raise ValueError(f"Embedding cache in {directory} holds {meta['dim']}-d vectors, not {dim}-d")
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.dim = meta["dim"]
+        self.max_rows = meta["max_rows"]
+        self.vectors = np.memmap(path, dtype=np.float32, mode="r+", shape=(self.max_rows, self.dim))
+
+    @staticmethod
+    def make_key(text):
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _rows_for(self, keys):
+        # {key: row} for the keys that are in the cache
+        rows = {}
+        for start in range(0, len(keys), SQL_BATCH):
+            batch = keys[start : start + SQL_BATCH]
+            rows.update(
+                self.conn.execute(
+                    f"SELECT key, row FROM rows WHERE key IN ({','.join('?' * len(batch))})", batch
+                )
+            )
+        return rows
+
+    def get_many(self, keys, touch=True):
+        """
+        Batch lookup. Returns (vectors, found): an (n, dim) float32 array with the cached vectors
+        and a boolean mask of the keys that were found (rows of missing keys are zero).
+        """
+        keys = list(keys)
+        vectors = np.zeros((len(keys), self.dim), dtype=np.float32)
+        found = np.zeros(len(keys), dtype=bool)
+        with self.lock:
+            rows = self._rows_for(keys)
+            positions = [i for i, key in enumerate(keys) if key in rows]
+            if positions:
+                vectors[positions] = self.vectors[[rows[keys[i]] for i in positions]]
+                # A writer may have recycled a row while it was copied: keep only rows that
+                # still belong to the same key (writers unlink a row before overwriting it)
+                current = self._rows_for([keys[i] for i in positions])
+                positions = [i for i in positions if current.get(keys[i]) == rows[keys[i]]]
+                found[positions] = True
+                if touch:
+                    self._touch([keys[i] for i in positions])
+            self.hits += len(positions)
+            self.misses += len(keys) - len(positions)
+        if not found.all():
+            vectors[~found] = 0.0
+        return vectors, found
+
+    def _touch(self, keys):
+        now = time.time()
+        for start in range(0, len(keys), SQL_BATCH):
+            batch = keys[start : start + SQL_BATCH]
+            self.conn.execute(
+                f"UPDATE rows SET last_access = ? WHERE key IN ({','.join('?' * len(batch))})",
+                [now, *batch],
+            )
+
+    def put_many(self, keys, vectors):
+        # Store vectors for keys that are not cached yet, evicting least recently used rows
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        new = {}
+        for key, vector in zip(keys, vectors):
+            new.setdefault(key, vector)
+        with self.lock:
+            for key in self._rows_for(list(new)):
+                del new[key]
+            if not new:
+                return
+            rows = self._reserve_rows(len(new))
+            items = list(new.items())[: len(rows)]
+
+            # Vectors are written while their rows are unlinked, so no reader can see them yet
+            self.vectors[rows] = np.stack([vector for _, vector in items])
+            self.vectors.flush()
+
+            now = time.time()
+            self.conn.execute("BEGIN IMMEDIATE")
+            self.conn.executemany(
+                "UPDATE OR IGNORE rows SET key = ?, last_access = ?, reserved = NULL WHERE row = ?",
+                [(key, now, row) for (key, _), row in zip(items, rows)],
+            )
+            # Keys another process stored meanwhile: give their reserved rows back
+            self.conn.execute(
+                f"UPDATE rows SET reserved = NULL WHERE key IS NULL AND row IN ({','.join('?' * len(rows))})",
+                rows,
+            )
+            self.conn.execute("COMMIT")
+
+    def _reserve_rows(self, count):
+        # Pick free, never used and then least recently used rows, unlinked from their old keys
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = [
+                row
+                for (row,) in self.conn.execute(
+                    "SELECT row FROM rows WHERE key IS NULL AND (reserved IS NULL OR reserved < ?) LIMIT ?",
+                    (now - RESERVATION_TIMEOUT, count),
+                )
+            ]
+            if len(rows) < count:
+                next_row = self.conn.execute("SELECT COALESCE(MAX(row), -1) + 1 FROM rows").fetchone()[0]
+                unused = list(range(next_row, min(self.max_rows, next_row + count - len(rows))))
+                self.conn.executemany("INSERT INTO rows (row) VALUES (?)", [(row,) for row in unused])
+                rows += unused
+            if len(rows) < count:
+                evicted = [
+                    row
+                    for (row,) in self.conn.execute(
+                        "SELECT row FROM rows WHERE key IS NOT NULL ORDER BY last_access LIMIT ?",
+                        (count - len(rows),),
+                    )
+                ]
+                self.evictions += len(evicted)
+                rows += evicted
+            self.conn.executemany(
+                "UPDATE rows SET key = NULL, reserved = ? WHERE row = ?", [(now, row) for row in rows]
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return rows
+
+    def stats(self):
+        # Counters for this session plus the number of cached vectors
+        with self.lock:
+            entries = self.conn.execute("SELECT COUNT(*) FROM rows WHERE key IS NOT NULL").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": entries,
+            "max_rows": self.max_rows,
+        }
+
+    def clear(self):
+        # Forget every cached vector (the rows are reused by later writes)
+        with self.lock:
+            self.conn.execute("UPDATE rows SET key = NULL, last_access = NULL, reserved = NULL")
+
+    def close(self):
+        self.conn.close()
+        del self.vectors
+
+
+class CachedEmbeddings:
+    def __init__(self, embeddings, directory, max_rows=100_000):
+        # Wraps any LangChain embeddings (same embed_documents/embed_query interface) so that
+        # each distinct text is only embedded once
+        self.embeddings = embeddings
+        self.directory = directory
+        self.max_rows = max_rows
+        self.cache = None
+        self.cache_lock = threading.Lock()
+
+    def _get_cache(self, dim=None):
+        # Opened on first use; a new cache takes its dimension from the first vectors
+        with self.cache_lock:
+            if self.cache is None and (dim is not None or os.path.exists(os.path.join(self.directory, "index.sqlite"))):
+                self.cache = EmbeddingCache(self.directory, dim, self.max_rows)
+            return self.cache
+
+    def embed_documents(self, texts):
+        return self.embed_documents_cached(texts)[0]
+
+    def embed_documents_cached(self, texts):
+        # embed_documents() plus a boolean array marking the texts served from the cache
+        keys = [EmbeddingCache.make_key(text) for text in texts]
+        cache = self._get_cache()
+        if cache is not None:
+            vectors, found = cache.get_many(keys)
+        else:
+            vectors, found = None, np.zeros(len(texts), dtype=bool)
+
+        missing = np.flatnonzero(~found)
+        if len(missing):
+            embedded = np.asarray(
+                self.embeddings.embed_documents([texts[i] for i in missing]), dtype=np.float32
+            )
+            cache = self._get_cache(embedded.shape[1])
+            cache.put_many([keys[i] for i in missing], embedded)
+            if vectors is None:
+                vectors = np.zeros((len(texts), embedded.shape[1]), dtype=np.float32)
+            vectors[missing] = embedded
+        return vectors.tolist(), found
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+# Example usage: several processes reading and writing one cache at once
+if __name__ == "__main__":
+    import multiprocessing
+    import tempfile
+
+    def expected(key):
+        # Deterministic vector for a key, so torn or misplaced rows would be noticed
+        return np.random.default_rng(int(key[:8], 16)).standard_normal(384).astype(np.float32)
+
+    def worker(directory, seed, rounds, errors):
+        cache = EmbeddingCache(directory)
+        rng = np.random.default_rng(seed)
+        for _ in range(rounds):
+            keys = [EmbeddingCache.make_key(str(i)) for i in rng.integers(0, 3000, 64)]
+            vectors, found = cache.get_many(keys)
+            for key, vector, hit in zip(keys, vectors, found):
+                if hit and not np.array_equal(vector, expected(key)):
+                    errors.value += 1
+            missing = [key for key, hit in zip(keys, found) if not hit]
+            cache.put_many(missing, [expected(key) for key in missing])
+        print(f"Worker {seed}: {cache.stats()}")
+
+    directory = tempfile.mkdtemp()
+    EmbeddingCache(directory, dim=384, max_rows=2000)
+    errors = multiprocessing.Value("i", 0)
+    start = time.time()
+    processes = [multiprocessing.Process(target=worker, args=(directory, seed, 200, errors)) for seed in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    print(f"4 processes x 200 batches of 64 in {time.time() - start:.2f}s, {errors.value} corrupted vectors")
@@ -1,13 +1,32 @@
+import asyncio
 import threading
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
 from web_crawler import WebScraper
-from serper_service import SerperClient
+from registry import get_serper_client
 
 
 class WebContentFetcher:
-    def __init__(self, query):
+    MAX_WORKERS = 16  # Crawler threads shared by every fetcher in the process
+    PER_HOST_LIMIT = 2  # Pages downloaded from the same host at once
+    FETCH_DEADLINE = 15.0  # Seconds allowed for the whole crawl phase of one query
+
+    # Shared by all fetchers so thread and socket counts stay bounded when many queries run at once.
+    # A URL only enters the pool once its host has a free slot, so no worker ever sits waiting on
+    # a busy host while URLs of other hosts (or other fetchers) are queued behind it
+    _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="web-crawler")
+    _host_active = {}  # Host -> URLs of that host submitted to the pool
+    _host_waiting = {}  # Host -> deque of (fetcher, thread_id, urls) waiting for a free slot
+    _hosts_lock = threading.Lock()
+
+    def __init__(self, query, deadline=None, min_results=None, serper_client=None):
         # Initialize the fetcher with a search query
         self.query = query
+        self.serper_client = serper_client  # Defaults to the process-wide client from the registry
+        self.deadline = deadline if deadline is not None else self.FETCH_DEADLINE
+        self.min_results = min_results  # Stop crawling once this many pages have content
         self.web_contents = []  # Stores the fetched web contents
         self.error_urls = []  # Stores URLs that resulted in an error during fetching
         self.web_contents_lock = (
@@ -16,29 +35,86 @@ class WebContentFetcher:
         self.error_urls_lock = (
             threading.Lock()
         )  # Lock for thread-safe operations on error_urls
+        self.timings = {}  # URL -> seconds spent to fetch, parse and extract it
+        self.cancelled = threading.Event()  # Set once the crawl phase is over; stops running downloads
+        self.end_time = None  # Deadline of the crawl phase, set when it starts
+        self.unfinished = 0  # URLs of this fetcher not crawled or skipped yet
+        self.finished = threading.Condition()  # Notified whenever one of them is done
+
+    @classmethod
+    def _schedule(cls, fetcher, thread_id, urls):
+        # Submit a URL to the pool if its host has a free slot, else queue it for that host
+        host = urlparse(urls[thread_id]).netloc
+        with cls._hosts_lock:
+            if cls._host_active.get(host, 0) >= cls.PER_HOST_LIMIT:
+                cls._host_waiting.setdefault(host, deque()).append((fetcher, thread_id, urls))
+                return
+            cls._host_active[host] = cls._host_active.get(host, 0) + 1
+        cls._executor.submit(cls._run, host, fetcher, thread_id, urls)
+
+    @classmethod
+    def _run(cls, host, fetcher, thread_id, urls):
+        # Crawl one URL, then pass its host slot on to the next URL waiting for that host
+        try:
+            fetcher._web_crawler_thread(thread_id, urls)
+        finally:
+            fetcher._url_done()
+            next_url = None
+            with cls._hosts_lock:
+                waiting = cls._host_waiting.get(host)
+                while waiting and next_url is None:
+                    next_url = waiting.popleft()
+                    if next_url[0].cancelled.is_set():
+                        # Its fetcher has stopped crawling; drop it without a download
+                        next_url[0]._url_done()
+                        next_url = None
+                if not waiting:
+                    cls._host_waiting.pop(host, None)
+                if next_url is None:
+                    cls._host_active[host] -= 1
+                    if not cls._host_active[host]:
+                        del cls._host_active[host]
+            if next_url is not None:
+                # Resubmitted rather than run here, so URLs already queued in the pool go first
+                cls._executor.submit(cls._run, host, *next_url)
+
+    def _url_done(self):
+        with self.finished:
+            self.unfinished -= 1
+            self.finished.notify_all()
 
     def _web_crawler_thread(self, thread_id: int, urls: list):
-        # Thread function to crawl each URL
+        # Worker function to crawl each URL
+        url = urls[thread_id]
+        if self.cancelled.is_set():
+            return
         try:
             print(f"Starting web crawler thread {thread_id}")
             start_time = time.time()
 
-            url = urls[thread_id]
+            # One streaming download extracts the content under both crawl rules; it stops
+            # between chunks once the crawl phase is cancelled
             scraper = WebScraper()
-            content = scraper.scrape_url(url, 0)
+            contents = scraper.scrape_url_all_rules(url, cancelled=self.cancelled)
+            content = contents[0]
+            self.timings[url] = scraper.timings
 
             # If the scraped content is too short, try extending the crawl rules
             if 0 < len(content) < 800:
-                content = scraper.scrape_url(url, 1)
+                content = contents[1]
 
-            # If the content length is sufficient, add it to the shared list
+            # If the content length is sufficient, add it to the shared list; cancelled is set under
+            # the same lock, so nothing is added once fetch() has taken the results
             if len(content) > 300:
                 with self.web_contents_lock:
-                    self.web_contents.append({"url": url, "content": content})
+                    if not self.cancelled.is_set():
+                        self.web_contents.append({"url": url, "content": content})
 
             end_time = time.time()
+            timings = self.timings[url]
             print(
-                f"Thread {thread_id} completed! Time consumed: {end_time - start_time:.2f}s"
+                f"Thread {thread_id} completed! Time consumed: {end_time - start_time:.2f}s "
+                f"(fetch {timings['fetch']:.2f}s, parse {timings['parse']:.2f}s, extract {timings['extract']:.2f}s)"
             )
 
         except Exception as e:
@@ -49,22 +125,34 @@ class WebContentFetcher:
 
     def _serper_launcher(self):
         # Function to launch the Serper client and get search results
-        serper_client = SerperClient()
+        serper_client = self.serper_client or get_serper_client()
         serper_results = serper_client.serper(self.query)
         return serper_client.extract_components(serper_results)
 
     def _crawl_threads_launcher(self, url_list):
-        # Create and start threads for each URL in the list
-        threads = []
+        # Schedule every URL on the shared worker pool and wait until the deadline,
+        # or until enough pages have content, whichever comes first
+        self.end_time = time.time() + self.deadline
+        with self.finished:
+            self.unfinished = len(url_list)
         for i in range(len(url_list)):
-            thread = threading.Thread(
-                target=self._web_crawler_thread, args=(i, url_list)
-            )
-            threads.append(thread)
-            thread.start()
-        # Wait for all threads to finish execution
-        for thread in threads:
-            thread.join()
+            self._schedule(self, i, url_list)
+        with self.finished:
+            while self.unfinished:
+                with self.web_contents_lock:
+                    enough = self.min_results is not None and len(self.web_contents) >= self.min_results
+                if enough:
+                    break
+                remaining = self.end_time - time.time()
+                if remaining <= 0:
+                    print(f"Crawl deadline reached, dropping {self.unfinished} unfinished URLs")
+                    break
+                self.finished.wait(remaining)
+
+        # Cancel stragglers: queued URLs never start, and running downloads stop at their
+        # next chunk and discard their result
+        with self.web_contents_lock:
+            self.cancelled.set()
 
     def fetch(self):
         # Main method to fetch web content based on the query
@@ -73,20 +161,69 @@ class WebContentFetcher:
             url_list = serper_response["links"]
             self._crawl_threads_launcher(url_list)
             # Reorder the fetched content to match the order of URLs
-            ordered_contents = [
-                next(
-                    (
-                        item["content"]
-                        for item in self.web_contents
-                        if item["url"] == url
-                    ),
-                    "",
-                )
-                for url in url_list
-            ]
+            with self.web_contents_lock:
+                contents_by_url = {}
+                for item in self.web_contents:
+                    contents_by_url.setdefault(item["url"], item["content"])
+            ordered_contents = [contents_by_url.get(url, "") for url in url_list]
             return ordered_contents, serper_response
         return [], None
 
+    async def afetch(self, session, search_session=None):
+        # Async version of fetch() on a shared aiohttp.ClientSession for pages (search_session,
+        # if given, is used for the search). The session's connector bounds connections per
+        # host; stragglers past the deadline are cancelled outright
+        serper_client = self.serper_client or get_serper_client()
+        serper_results = await serper_client.aserper(self.query, search_session or session)
+        serper_response = serper_client.extract_components(serper_results)
+        if not serper_response:
+            return [], None
+
+        url_list = serper_response["links"]
+        tasks = {
+            asyncio.ensure_future(self._acrawl_url(url, session)): url for url in url_list
+        }
+        contents = {}
+        pending = set(tasks)
+        loop = asyncio.get_running_loop()
+        end_time = loop.time() + self.deadline
+        while pending:
+            remaining = end_time - loop.time()
+            if remaining <= 0:
+                print(f"Crawl deadline reached, dropping {len(pending)} unfinished URLs")
+                break
+            done, pending = await asyncio.wait(
+                pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                content = task.result()
+                if len(content) > 300:
+                    contents[tasks[task]] = content
+            if self.min_results is not None and len(contents) >= self.min_results:
+                break
+        for task in pending:
+            task.cancel()
+
+        self.web_contents = [{"url": url, "content": content} for url, content in contents.items()]
+        return [contents.get(url, "") for url in url_list], serper_response
+
+    async def _acrawl_url(self, url, session):
+        # Same rules as _web_crawler_thread(), returning the content instead of storing it
+        try:
+            scraper = WebScraper()
+            contents = await scraper.ascrape_url_all_rules(url, session)
+            content = contents[0]
+            self.timings[url] = scraper.timings
+
+            # If the scraped content is too short, try extending the crawl rules
+            if 0 < len(content) < 800:
+                content = contents[1]
+            return content
+        except Exception as e:
+            self.error_urls.append(url)
+            print(f"Error crawling {url}: {e}")
+            return ""
+
 
 # Example usage
 if __name__ == "__main__":
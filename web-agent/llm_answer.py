@@ -1,52 +1,120 @@
 import time
-import os
-import yaml
-from fetch_web_content import WebContentFetcher
-from retrieval import EmbeddingRetriever
-from langchain.chat_models import ChatOpenAI
-from langchain.prompts import PromptTemplate
-from langchain.schema import HumanMessage
-from langchain.callbacks.streaming_stdout import StreamingStdOutCallbackHandler
+import re
+from registry import get_chat_model, get_config
+from serper_service import SerperClient
+
+CONTEXT_TOKEN_BUDGET = 1500  # Prompt tokens spent on web search results; see config.yaml.example
+CHARS_PER_TOKEN = 4  # Rough token estimate, as for the SWIFT scoring prompts
+MIN_PARTIAL_TOKENS = 40  # A chunk is only cut if at least this much of it still fits
+DUPLICATE_SIMILARITY = 0.8  # Shingle overlap (Jaccard) above which a chunk repeats an earlier one
+SENTENCE_END = re.compile(r"[.!?。！？][\"'”’)\]]*(?=\s|$)")
+# Words whose trailing period does not end a sentence: initials like "U.S." and common titles
+ABBREVIATION = re.compile(
+    r"[(\[\"'“‘]*(?:(?:[^\W\d_]\.)*[^\W\d_]|Mr|Mrs|Ms|Dr|Prof|St|Jr|Sr|vs|etc|Inc|Ltd|Co|Fig|approx)",
+    re.IGNORECASE,
+)
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def truncate_sentences(text, max_chars):
+    # The longest prefix of text that ends at a sentence boundary and fits in max_chars, or ""
+    # Matched over the whole text so the cut itself never looks like the end of the text
+    end = 0
+    for match in SENTENCE_END.finditer(text):
+        if match.end() > max_chars:
+            break
+        if match.group().startswith("."):
+            words = text[max(0, match.start() - 12) : match.start()].split()
+            if words and ABBREVIATION.fullmatch(words[-1]):
+                continue
+        end = match.end()
+    return text[:end]
+
+
+def shingles(text, size=3):
+    # Hashes of the word n-grams of a chunk, for near-duplicate detection
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) < size:
+        return {hash(tuple(words))}
+    return {hash(tuple(words[i : i + size])) for i in range(len(words) - size + 1)}
 
 
 class GPTAnswer:
-    TOP_K = 10  # Top K documents to retrieve
+    TOP_K = 10  # Most documents used as references
 
     def __init__(self):
-        # Load configuration from a YAML file
-        config_path = os.path.join(os.path.dirname(__file__), "config", "config.yaml")
-        with open(config_path, "r") as file:
-            self.config = yaml.safe_load(file)
+        # Configuration from config.yaml, parsed once per process
+        self.config = get_config()
         self.model_name = self.config["model_name"]
         self.api_key = self.config["openai_api_key"]
+        self.api_base = self.config.get("openai_api_base")  # Optional, e.g. a local stand-in server
+        self.context_token_budget = self.config.get("context_token_budget", CONTEXT_TOKEN_BUDGET)
+        self.prompt_template = None  # Compiled from the template on first use
 
     def _format_reference(self, relevant_docs_list, link_list):
         # Format the references from the retrieved documents for use in the prompt
-        reference_url_list = [
-            (relevant_docs_list[i].metadata)["url"] for i in range(self.TOP_K)
-        ]
-        reference_content_list = [
-            relevant_docs_list[i].page_content for i in range(self.TOP_K)
-        ]
-        reference_index_list = [
-            link_list.index(link) + 1 for link in reference_url_list
-        ]
+        packed = self._pack_references(relevant_docs_list)
+        link_index = SerperClient.build_link_index(link_list)
+        reference_index_list = [link_index[doc.metadata["url"]] + 1 for doc, _ in packed]
         rearranged_index_list = self._rearrange_index(reference_index_list)
 
         # Create a formatted string of references
-        formatted_reference = "\n"
-        for i in range(self.TOP_K):
-            formatted_reference += (
-                "Webpage["
-                + str(rearranged_index_list[i])
-                + "], url: "
-                + reference_url_list[i]
-                + ":\n"
-                + reference_content_list[i]
-                + "\n\n\n"
-            )
+        formatted_reference = "\n" + "".join(
+            self._format_webpage(index, doc.metadata["url"], content)
+            for index, (doc, content) in zip(rearranged_index_list, packed)
+        )
         return formatted_reference
 
+    @staticmethod
+    def _format_webpage(index, url, content):
+        return "Webpage[" + str(index) + "], url: " + url + ":\n" + content + "\n\n\n"
+
+    def _pack_references(self, relevant_docs_list):
+        """
+        Picks (doc, content) pairs for the prompt from docs ranked best first, as the retriever
+        returns them. Chunks that mostly repeat an earlier one are skipped, and packing stops once
+        context_token_budget is spent; the chunk that crosses it is cut at a sentence boundary so
+        every quoted sentence still appears verbatim. A budget of None packs all TOP_K chunks.
+        """
+        budget = self.context_token_budget
+        packed = []
+        kept_shingles = []
+        kept_by_shingle = {}  # Shingle -> positions in kept_shingles, so each check is linear
+        for doc in relevant_docs_list[: self.TOP_K]:
+            content = doc.page_content
+            chunk_shingles = shingles(content)
+            overlaps = {}
+            for shingle in chunk_shingles:
+                for kept in kept_by_shingle.get(shingle, ()):
+                    overlaps[kept] = overlaps.get(kept, 0) + 1
+            if any(
+                overlap / (len(chunk_shingles) + len(kept_shingles[kept]) - overlap) >= DUPLICATE_SIMILARITY
+                for kept, overlap in overlaps.items()
+            ):
+                continue
+
+            if budget is not None:
+                overhead = estimate_tokens(self._format_webpage(0, doc.metadata["url"], ""))
+                available = budget - overhead
+                if estimate_tokens(content) > available:
+                    if available < MIN_PARTIAL_TOKENS:
+                        break
+                    content = truncate_sentences(content, available * CHARS_PER_TOKEN)
+                    if not content:
+                        # Not even one sentence fits; a shorter chunk further down still might
+                        continue
+                budget -= overhead + estimate_tokens(content)
+
+            for shingle in chunk_shingles:
+                kept_by_shingle.setdefault(shingle, []).append(len(kept_shingles))
+            kept_shingles.append(chunk_shingles)
+            packed.append((doc, content))
+        return packed
+
     def _rearrange_index(self, original_index_list):
         # Rearrange indices to ensure they are unique and sequential
         index_dict = {}
@@ -60,39 +128,59 @@ class GPTAnswer:
         return rearranged_index_list
 
     def get_answer(self, query, relevant_docs, language, output_format, profile):
-        # Create an instance of ChatOpenAI and generate an answer
-        llm = ChatOpenAI(
-            model_name=self.model_name,
-            openai_api_key=self.api_key,
-            temperature=0.0,
-            streaming=True,
-            callbacks=[StreamingStdOutCallbackHandler()],
-            max_tokens=200,
-        )
+        # Generate an answer with the shared ChatOpenAI client, streaming it to stdout
+        from langchain.schema import HumanMessage
 
-        template = self.config["template"]
-        prompt_template = PromptTemplate(
-            input_variables=["profile", "context_str", "language", "query", "format"],
-            template=template,
-        )
+        llm = get_chat_model(self.model_name, self.api_key, self.api_base, streaming=True)
+
+        summary_prompt = self._build_prompt(query, relevant_docs, language, output_format, profile)
+        print("\n\nThe message sent to LLM:\n", summary_prompt)
+        print("\n\n", "=" * 30, "GPT's Answer: ", "=" * 30, "\n")
+        gpt_answer = llm([HumanMessage(content=summary_prompt)])
+
+        return gpt_answer
+
+    async def aget_answer(self, query, relevant_docs, language, output_format, profile):
+        # Async version of get_answer(); no stdout streaming, since many answers run at once
+        from langchain.schema import HumanMessage
+
+        llm = get_chat_model(self.model_name, self.api_key, self.api_base)
+        summary_prompt = self._build_prompt(query, relevant_docs, language, output_format, profile)
+        return await llm.ainvoke([HumanMessage(content=summary_prompt)])
+
+    def _build_prompt(self, query, relevant_docs, language, output_format, profile):
+        # Fill the answer template from config.yaml
+        if self.prompt_template is None:
+            from langchain.prompts import PromptTemplate
+
+            self.prompt_template = PromptTemplate(
+                input_variables=["profile", "context_str", "language", "query", "format"],
+                template=self.config["template"],
+            )
 
         profile = "conscientious researcher" if not profile else profile
-        summary_prompt = prompt_template.format(
+        summary_prompt = self.prompt_template.format(
             context_str=relevant_docs,
             language=language,
             query=query,
             format=output_format,
             profile=profile,
         )
-        print("\n\nThe message sent to LLM:\n", summary_prompt)
-        print("\n\n", "=" * 30, "GPT's Answer: ", "=" * 30, "\n")
-        gpt_answer = llm([HumanMessage(content=summary_prompt)])
-
-        return gpt_answer
+        return summary_prompt
 
 
 # Example usage
 if __name__ == "__main__":
+    # A cut inside a decimal or an abbreviation is not a sentence boundary
+    assert truncate_sentences("Revenue rose 6.4% to $2 billion. Costs fell.", 15) == ""
+    assert truncate_sentences("Revenue rose 6.4% to $2 billion. Costs fell.", 40) == "Revenue rose 6.4% to $2 billion."
+    assert truncate_sentences("The U.S. market grew. Exports fell.", 6) == ""
+    assert truncate_sentences("The U.S. market grew. Exports fell.", 25) == "The U.S. market grew."
+    assert truncate_sentences("Ask Dr. Smith first. Then wait.", 20) == "Ask Dr. Smith first."
+
+    from fetch_web_content import WebContentFetcher
+    from retrieval import EmbeddingRetriever
+
     content_processor = GPTAnswer()
     query = "What happened to Silicon Valley Bank"
     output_format = ""  # User can specify output format
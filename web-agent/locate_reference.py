@@ -1,15 +1,21 @@
 import re
 import json
+from serper_service import SerperClient
+from quote_index import QuoteIndex
 
 class ReferenceLocator:
-    def __init__(self, gpt_answer: str, serper_response: dict):
+    def __init__(self, gpt_answer: str, serper_response: dict, web_contents: list = None):
         self.gpt_answer = gpt_answer
         self.serper_response = serper_response
+        # Crawled page texts aligned with serper_response['links']; when given, every quoted
+        # sentence is checked against them
+        self.web_contents = web_contents
 
     def locate_source(self):
         """
         Returns a "list of information sources" for all "quoted sentences" in the GPT answer, 
-        such as web page title, URL, timestamp, original quoted text, etc.
+        such as web page title, URL, timestamp, original quoted text, etc. With web_contents,
+        each card also has a 'verification' of its quote (see QuoteIndex.verify).
         """
         # Split the answer into content and references parts
         splitted_answer = self.gpt_answer.split("\nReferences:")
@@ -51,20 +57,21 @@ class ReferenceLocator:
         index_pattern = r'\[\d+\]'
         index_list = re.findall(index_pattern, answer_references)
 
-        url_pattern = r'https://[^\n]+'
+        url_pattern = r'https?://[^\n]+'
         url_list = re.findall(url_pattern, answer_references)
 
         source_pattern = r'Quoted sentence: (.*?)\n'
         source_list = re.findall(source_pattern, answer_references)
 
-        reference_with_index = [{'index': int(index_list[i][1:-1]), 'url': url_list[i], 'source': source_list[i]} for i in range(len(index_list))]
+        # Index the references by their number, so each sentence is matched with one lookup
+        reference_by_index = {int(index_list[i][1:-1]): {'url': url_list[i], 'source': source_list[i]} for i in range(len(index_list))}
 
         sentences_with_references = []
-        for dict1 in sentences_with_index:
-            for dict2 in reference_with_index:
-                if dict1['index'] == dict2['index']:
-                    dict1.update({'url': dict2['url'], 'source': dict2['source']})
-                    sentences_with_references.append(dict1)
+        for sentence in sentences_with_index:
+            reference = reference_by_index.get(sentence['index'])
+            if reference is not None:
+                sentence.update(reference)
+                sentences_with_references.append(sentence)
 
         return sentences_with_references
 
@@ -73,11 +80,22 @@ class ReferenceLocator:
         Matches the sentences with references to the corresponding web information.
         """
         # Retrieve the web information (titles, timestamps, snippets) for each reference
-        url_index_list = self.serper_response['links']
-        reference_cards = [{'titles': self.serper_response['titles'][url_index_list.index(reference['url'])],
-                            # 'time': self.serper_response['time'][url_index_list.index(reference['url'])],
-                            'snippets': self.serper_response['snippets'][url_index_list.index(reference['url'])],
-                            **reference} for reference in sentences_with_references]
+        link_index = self.serper_response.get('link_index') or SerperClient.build_link_index(self.serper_response['links'])
+        quote_index = QuoteIndex(self.web_contents, self.serper_response['links']) if self.web_contents is not None else None
+        verifications = {}  # Several sentences often cite the same quote; each is verified once
+        reference_cards = []
+        for reference in sentences_with_references:
+            position = link_index[reference['url']]
+            card = {'titles': self.serper_response['titles'][position],
+                    # 'time': self.serper_response['time'][position],
+                    'snippets': self.serper_response['snippets'][position],
+                    **reference}
+            if quote_index is not None:
+                key = (reference['source'], reference['url'])
+                if key not in verifications:
+                    verifications[key] = quote_index.verify(*key)
+                card['verification'] = verifications[key]
+            reference_cards.append(card)
 
         return reference_cards
 
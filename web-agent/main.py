@@ -1,12 +1,14 @@
 from fetch_web_content import WebContentFetcher
-from retrieval import EmbeddingRetriever
-from llm_answer import GPTAnswer
 from locate_reference import ReferenceLocator
+from registry import get_answerer, get_retriever
 import time
 import json
 
+FILTER_PROMPT = ""
+OUTPUT_FORMAT = "In separate lines, mention 1. whether the idea falls under one of the categories: sloppy, off-topic (i.e., not sustainability related), unsuitable, or vague (such as the over-generic content that prioritizes form over substance, offering generalities instead of specific details). Return either (Yes - remove idea) if it falls under one of those categories or (No - keep idea) if it does not. 2. a viability score out of 100. 3. concise bullet points supporting whether to keep or remove the idea from 1. 4. If applicable, mention if there are existing companies or projects implementing the solution, and their progress or traction."  # User can specify output format,
+PROFILE = f"You are a sustainability expert and professional idea evaluator and filterer. You will receive a problem followed by a solution. This filtration system helps concentrate human evaluators' time and resources on concepts that are meticulously crafted, well-articulated, and hold tangible relevance. {FILTER_PROMPT}"
+
 if __name__ == "__main__":
-    filter_prompt = ""
     problem = "The usage of plastic bottles"
     solution = "Creating a service that sells bottles, and re-fill them with soda, water, juice or anything you want. This service will have stores and whenever you want to fill your bottle you can go there  insted of buying a new bottle of water or soda or anything."
 
@@ -19,8 +21,8 @@ if __name__ == "__main__":
     # query = f"Problem: {problem}. Solution: {solution}"
     # query = f"Problem: {good_problem}. Solution: {good_solution}"
     query = f"Problem: {bad_problem}. Solution: {bad_solution}"
-    output_format = "In separate lines, mention 1. whether the idea falls under one of the categories: sloppy, off-topic (i.e., not sustainability related), unsuitable, or vague (such as the over-generic content that prioritizes form over substance, offering generalities instead of specific details). Return either (Yes - remove idea) if it falls under one of those categories or (No - keep idea) if it does not. 2. a viability score out of 100. 3. concise bullet points supporting whether to keep or remove the idea from 1. 4. If applicable, mention if there are existing companies or projects implementing the solution, and their progress or traction."  # User can specify output format,
-    profile = f"You are a sustainability expert and professional idea evaluator and filterer. You will receive a problem followed by a solution. This filtration system helps concentrate human evaluators' time and resources on concepts that are meticulously crafted, well-articulated, and hold tangible relevance. {filter_prompt}"
+    output_format = OUTPUT_FORMAT
+    profile = PROFILE
 
     # Fetch web content based on the query
     web_contents_fetcher = WebContentFetcher(query)
@@ -29,11 +31,11 @@ if __name__ == "__main__":
     print(serper_response)
 
     # Retrieve relevant documents using embeddings
-    retriever = EmbeddingRetriever()
+    retriever = get_retriever()
     relevant_docs_list = retriever.retrieve_embeddings(
         web_contents, serper_response["links"], query
     )
-    content_processor = GPTAnswer()
+    content_processor = get_answerer()
     formatted_relevant_docs = content_processor._format_reference(
         relevant_docs_list, serper_response["links"]
     )
@@ -57,7 +59,7 @@ if __name__ == "__main__":
     # Optional Part: display the reference sources of the quoted sentences in LLM's answer
     #
     print("\n\n", "=" * 30, "Reference Cards: ", "=" * 30, "\n")
-    locator = ReferenceLocator(answer, serper_response)
+    locator = ReferenceLocator(answer, serper_response, web_contents)
     reference_cards = locator.locate_source()
     json_formatted_cards = json.dumps(reference_cards, indent=4)
     print(json_formatted_cards)
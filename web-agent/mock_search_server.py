@@ -0,0 +1,152 @@
+import argparse
+import hashlib
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+RESULTS_PER_QUERY = 10
+EMBEDDING_SIZE = 64
+PAGE_SENTENCES = [
+    "Refill stations for reusable bottles cut single use plastic waste in busy city centres every day.",
+    "Several companies already run deposit schemes that collect and wash glass bottles for another use.",
+    "Critics argue that refill services only work when stores are close enough for customers to visit often.",
+    "Studies of returnable packaging show lower lifetime emissions once a bottle is reused more than ten times.",
+    "Local councils have funded public water fountains to make carrying a reusable bottle more practical.",
+]
+
+
+def mock_page(slug):
+    # Deterministic HTML page for a search result: a heading and a few long paragraphs
+    offset = int(hashlib.sha256(slug.encode("utf-8")).hexdigest(), 16) % len(PAGE_SENTENCES)
+    sentences = PAGE_SENTENCES[offset:] + PAGE_SENTENCES[:offset]
+    paragraphs = "".join(f"<p>{sentence} {' '.join(sentences)}</p>" for sentence in sentences)
+    return f"<html><head><title>{slug}</title></head><body><h1>Result {slug}</h1>{paragraphs}</body></html>"
+
+
+def mock_search(query, base_url):
+    # Serper-shaped search response whose links point back at this server
+    digest = hashlib.sha256(query.encode("utf-8")).hexdigest()[:12]
+    organic = [
+        {
+            "title": f"Result {i + 1} for the query",
+            "link": f"{base_url}/page/{digest}-{i}",
+            "snippet": PAGE_SENTENCES[i % len(PAGE_SENTENCES)],
+        }
+        for i in range(RESULTS_PER_QUERY)
+    ]
+    return {"searchParameters": {"q": query}, "organic": organic}
+
+
+def mock_embedding(text):
+    # Deterministic hashed bag-of-words vector, normalised to unit length
+    vector = [0.0] * EMBEDDING_SIZE
+    for word in re.findall(r"\w+", text.lower()):
+        vector[int(hashlib.md5(word.encode("utf-8")).hexdigest(), 16) % EMBEDDING_SIZE] += 1.0
+    norm = sum(value * value for value in vector) ** 0.5 or 1.0
+    return [value / norm for value in vector]
+
+
+def mock_answer(prompt):
+    # Answer in the format expected by ReferenceLocator, quoting the first webpage in the prompt
+    match = re.search(r"Webpage\[(\d+)\], url: (\S+):\n(.+?[.!?])", prompt)
+    if not match:
+        return "1. No - keep idea.\n2. 50 out of 100.\n3. - No web results to support the idea."
+    index, url, quote = match.groups()
+    return (
+        f"\n1. No - keep idea.\n2. 72 out of 100.\n3. {quote} [{index}]\n"
+        f"\nReferences:\n[{index}] URL: {url}\n    Quoted sentence: {quote}\n"
+    )
+
+
+class MockSearchHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real services
+    latency = 0.5  # Seconds to wait before answering, to mimic a real round trip
+
+    def do_GET(self):
+        # Web pages of the search results
+        time.sleep(self.latency)
+        slug = urlparse(self.path).path.rsplit("/", 1)[-1]
+        self._send(mock_page(slug).encode("utf-8"), "text/html; charset=utf-8")
+
+    def do_POST(self):
+        # Serper search, OpenAI embeddings and OpenAI chat completions
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        path = urlparse(self.path).path
+        time.sleep(self.latency)
+
+        if path.endswith("/embeddings"):
+            inputs = request.get("input", [])
+            inputs = [inputs] if isinstance(inputs, str) else inputs
+            response = {
+                "object": "list",
+                "data": [
+                    {"object": "embedding", "index": i, "embedding": mock_embedding(str(text))}
+                    for i, text in enumerate(inputs)
+                ],
+                "model": request.get("model", ""),
+                "usage": {"prompt_tokens": 0, "total_tokens": 0},
+            }
+        elif path.endswith("/chat/completions"):
+            messages = request.get("messages", [])
+            content = mock_answer(messages[-1].get("content", "") if messages else "")
+            response = {
+                "id": "chatcmpl-mock",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", ""),
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+            }
+        else:
+            host = self.headers.get("Host", "%s:%d" % self.server.server_address)
+            response = mock_search(request.get("q", ""), f"http://{host}")
+        self._send(json.dumps(response).encode("utf-8"), "application/json")
+
+    def _send(self, body, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Keep benchmark output readable
+        pass
+
+
+def start_mock_server(host="127.0.0.1", port=0, latency=0.5):
+    # Start the stand-in server in a background thread; returns it with its search URL and API base
+    handler = type("Handler", (MockSearchHandler,), {"latency": latency})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://{host}:{server.server_address[1]}"
+    return server, f"{base_url}/search", f"{base_url}/v1"
+
+
+# Example usage: python mock_search_server.py --port 8001 --latency 0.5
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for Serper, web pages and OpenAI")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.5)
+    args = parser.parse_args()
+
+    server, search_url, api_base = start_mock_server(args.host, args.port, args.latency)
+    print(f"Search: {search_url}\nOpenAI API base: {api_base}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
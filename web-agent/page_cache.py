@@ -0,0 +1,133 @@
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from sqlite_lru import SqliteLRU
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(__file__), ".swift_cache", "pages.sqlite")
+
+
+class PageCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=24 * 3600, max_bytes=512 * 1024 * 1024):
+        """
+        Persistent cache of downloaded pages keyed by URL. Bodies are stored zlib-compressed
+        with their ETag/Last-Modified headers. Pages younger than ttl seconds are served without
+        touching the network; older ones are revalidated with a conditional GET. Least recently
+        used pages are evicted once the compressed bodies exceed max_bytes.
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0  # Fresh pages served without a request
+        self.revalidated = 0  # Stale pages confirmed unchanged by a 304 response
+        self.misses = 0  # Pages downloaded in full and stored
+        # Shared by the crawler threads, so access is serialised with a lock
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        # A lost write only costs a re-download, so skip the fsync on every commit
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "url TEXT PRIMARY KEY, body BLOB NOT NULL, etag TEXT, last_modified TEXT, "
+            "size INTEGER NOT NULL, fetched REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS pages_last_access ON pages (last_access)")
+        self.conn.commit()
+        self.lru = SqliteLRU(self.conn, "pages", "url", max_bytes)
+
+    def get(self, url):
+        # Return {"body", "etag", "last_modified", "fresh"} for a cached page, or None
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT body, etag, last_modified, fetched FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            body, etag, last_modified, fetched = row
+            now = time.time()
+            fresh = now - fetched < self.ttl
+            if fresh:
+                self.hits += 1
+            self.conn.execute("UPDATE pages SET last_access = ? WHERE url = ?", (now, url))
+            self.conn.commit()
+        return {
+            "body": zlib.decompress(body),
+            "etag": etag,
+            "last_modified": last_modified,
+            "fresh": fresh,
+        }
+
+    def conditional_headers(self, entry):
+        # Request headers that let the server answer 304 Not Modified for a cached page
+        headers = {}
+        if entry is not None and entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry is not None and entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def put(self, url, body, etag=None, last_modified=None):
+        # Store a downloaded page and evict the least recently used pages if the cache is too big
+        compressed = zlib.compress(body, 6)
+        now = time.time()
+        with self.lock:
+            self.misses += 1
+            self.lru.put(
+                {
+                    "url": url,
+                    "body": compressed,
+                    "etag": etag,
+                    "last_modified": last_modified,
+                    "size": len(compressed),
+                    "fetched": now,
+                    "last_access": now,
+                }
+            )
+            self.conn.commit()
+
+    def touch(self, url):
+        # Restart the TTL of a page after the server confirmed it is unchanged
+        now = time.time()
+        with self.lock:
+            self.revalidated += 1
+            self.conn.execute(
+                "UPDATE pages SET fetched = ?, last_access = ? WHERE url = ?", (now, now, url)
+            )
+            self.conn.commit()
+
+    def stats(self):
+        # Counters for this session plus the current size of the cache
+        with self.lock:
+            entries, size = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def clear(self):
+        # Remove every cached page
+        with self.lock:
+            self.lru.clear()
+            self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+# Example usage
+if __name__ == "__main__":
+    cache = PageCache()
+    url = "https://en.wikipedia.org/wiki/Reusable_packaging"
+    print("First lookup:", cache.get(url))
+    cache.put(url, b"<html><body><p>Reusable packaging</p></body></html>", etag='"abc"')
+    entry = cache.get(url)
+    print("Second lookup:", entry, cache.conditional_headers(entry))
+    print(cache.stats())
@@ -0,0 +1,134 @@
+import re
+import time
+import unicodedata
+from serper_service import SerperClient
+
+SHINGLE_SIZE = 4  # Words per indexed n-gram
+FUZZY_COVERAGE = 0.5  # Share of a quote's n-grams that must be found in order for a fuzzy match
+MAX_DRIFT = 3  # Words a fuzzy match may shift by through insertions or deletions
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def normalize_word(word):
+    # Case-folded, with compatibility characters (ligatures, full-width letters) unified
+    if not word.isascii():
+        word = unicodedata.normalize("NFKC", word)
+    return word.casefold()
+
+
+def words_with_offsets(text):
+    # Normalized words of text with their character offsets in text; punctuation and whitespace
+    # are dropped, so curly quotes, dashes and line breaks in either text never break a match
+    return [(normalize_word(match.group()), match.start()) for match in WORD_PATTERN.finditer(text)]
+
+
+class QuoteIndex:
+    def __init__(self, contents, links):
+        """
+        Index of the crawled pages of one search for verifying quoted sentences. Every run of
+        SHINGLE_SIZE consecutive words is hashed to its (page, word position), so a quote is
+        checked with one lookup per word instead of a scan of the page text. Built once per
+        answer and shared by all of its quotes.
+        """
+        self.links = list(links)
+        self.link_index = SerperClient.build_link_index(self.links)
+        self.pages = []  # Per page: (words, character offsets)
+        self.shingles = {}  # Hash of a word n-gram -> [(page, word position)]
+        for page, content in enumerate(contents):
+            entries = words_with_offsets(content or "")
+            words = [word for word, _ in entries]
+            self.pages.append((words, [offset for _, offset in entries]))
+            for position in range(len(words) - SHINGLE_SIZE + 1):
+                key = hash(tuple(words[position : position + SHINGLE_SIZE]))
+                self.shingles.setdefault(key, []).append((page, position))
+
+    def verify(self, quote, url=None):
+        """
+        Locates a quote in the crawled pages. Returns {"status", "url", "offset", "score"}:
+        "exact" when every word of the quote appears in order (ignoring case, whitespace and
+        punctuation), "fuzzy" when at least FUZZY_COVERAGE of its n-grams line up in one place,
+        else "unmatched". offset is the character position of the match in that page's content
+        and score the share of the quote's n-grams found. The cited url wins ties.
+        """
+        words = [word for word, _ in words_with_offsets(quote)]
+        if not words:
+            return {"status": "unmatched", "url": None, "offset": None, "score": 0.0}
+        if len(words) < SHINGLE_SIZE:
+            return self._verify_short(words, url)
+
+        # Each n-gram hit votes for the page position where the quote would start
+        votes = {}
+        quote_shingles = len(words) - SHINGLE_SIZE + 1
+        for position in range(quote_shingles):
+            for page, page_position in self.shingles.get(hash(tuple(words[position : position + SHINGLE_SIZE])), ()):
+                start = (page, page_position - position)
+                votes.setdefault(start, set()).add(position)
+        if not votes:
+            return {"status": "unmatched", "url": None, "offset": None, "score": 0.0}
+
+        # The start with the most n-grams in order wins, then exact alignment, then the cited page
+        cited = self.link_index.get(url)
+        best, best_rank = None, None
+        for (page, start), aligned in votes.items():
+            # Insertions and deletions in the quote shift later n-grams by a few words
+            found = set(aligned)
+            for drift in range(1, MAX_DRIFT + 1):
+                found |= votes.get((page, start - drift), set()) | votes.get((page, start + drift), set())
+            rank = (len(found), len(aligned), page == cited)
+            if best_rank is None or rank > best_rank:
+                best, best_rank = (page, start), rank
+
+        page, start = best
+        page_words, offsets = self.pages[page]
+        score = best_rank[0] / quote_shingles
+        start = max(start, 0)
+        if page_words[start : start + len(words)] == words:
+            status = "exact"
+        elif score >= FUZZY_COVERAGE:
+            status = "fuzzy"
+        else:
+            return {"status": "unmatched", "url": None, "offset": None, "score": round(score, 3)}
+        return {"status": status, "url": self.links[page], "offset": offsets[start], "score": round(score, 3)}
+
+    def _verify_short(self, words, url):
+        # Quotes shorter than one n-gram are looked up word by word, cited page first
+        cited = [self.link_index[url]] if url in self.link_index else []
+        for page in cited + [page for page in range(len(self.pages)) if page not in cited]:
+            page_words, offsets = self.pages[page]
+            for start in range(len(page_words) - len(words) + 1):
+                if page_words[start : start + len(words)] == words:
+                    return {"status": "exact", "url": self.links[page], "offset": offsets[start], "score": 1.0}
+        return {"status": "unmatched", "url": None, "offset": None, "score": 0.0}
+
+
+# Example usage: verify quotes against ten crawled pages and time many answers
+if __name__ == "__main__":
+    from mock_search_server import mock_page
+    from web_crawler import MainContentExtractor
+
+    links = [f"https://example.com/{i}" for i in range(10)]
+    contents = []
+    for i in range(10):
+        extractor = MainContentExtractor()
+        extractor.feed(mock_page(f"page-{i}") * 20)
+        contents.append(extractor.close()[0] + f" Page {i} ends with its own closing remark number {i}.")
+
+    index = QuoteIndex(contents, links)
+    sentence = contents[3].split(". ")[1] + "."
+    for quote in [
+        sentence,
+        sentence.upper().replace(" ", "  "),  # Case and whitespace differ
+        sentence.replace("bottle", "flask", 1),  # Paraphrased by one word
+        "Page 7 ends with its own closing remark number 7.",
+        "This sentence was never on any page we crawled.",
+    ]:
+        print(index.verify(quote, links[3]), "<-", quote[:60])
+
+    start = time.perf_counter()
+    for _ in range(100):
+        index = QuoteIndex(contents, links)
+        for i in range(10):
+            index.verify(f"Page {i} ends with its own closing remark number {i}.", links[i])
+    elapsed = time.perf_counter() - start
+    words = sum(len(page_words) for page_words, _ in index.pages)
+    print(f"100 answers with 10 quotes over {words} crawled words: {elapsed / 100 * 1000:.1f} ms per answer")
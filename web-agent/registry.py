@@ -0,0 +1,76 @@
+import os
+import threading
+import yaml
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), "config", "config.yaml")
+
+_lock = threading.RLock()
+_configs = {}  # Path -> (modification time, parsed config)
+_chat_models = {}  # Settings -> ChatOpenAI
+_shared = {}  # Name -> process-wide client
+
+
+def get_config(path=CONFIG_PATH):
+    """
+    Parsed config.yaml, read once per process and again only after the file changes. Each
+    caller gets its own shallow copy, so per-instance overrides (e.g. a stand-in api base)
+    never leak into other clients.
+    """
+    mtime = os.stat(path).st_mtime
+    with _lock:
+        cached = _configs.get(path)
+        if cached is None or cached[0] != mtime:
+            with open(path, "r") as file:
+                cached = (mtime, yaml.safe_load(file))
+            _configs[path] = cached
+    return dict(cached[1])
+
+
+def get_chat_model(model_name, api_key, api_base=None, max_tokens=200, streaming=False):
+    # One ChatOpenAI per distinct setting, reused by every answer; langchain is imported on first use
+    key = (model_name, api_key, api_base, max_tokens, streaming)
+    with _lock:
+        if key not in _chat_models:
+            from langchain.chat_models import ChatOpenAI
+
+            options = {}
+            if streaming:
+                from langchain.callbacks.streaming_stdout import StreamingStdOutCallbackHandler
+
+                options = {"streaming": True, "callbacks": [StreamingStdOutCallbackHandler()]}
+            _chat_models[key] = ChatOpenAI(
+                model_name=model_name,
+                openai_api_key=api_key,
+                openai_api_base=api_base,
+                temperature=0.0,
+                max_tokens=max_tokens,
+                **options,
+            )
+        return _chat_models[key]
+
+
+def _get_shared(name, factory):
+    with _lock:
+        if name not in _shared:
+            _shared[name] = factory()
+        return _shared[name]
+
+
+def get_serper_client():
+    # Shared SerperClient, so the search cache and settings are set up once per process
+    from serper_service import SerperClient
+
+    return _get_shared("serper_client", SerperClient)
+
+
+def get_retriever():
+    # Shared EmbeddingRetriever, so the vector store and local model are opened once per process
+    from retrieval import EmbeddingRetriever
+
+    return _get_shared("retriever", EmbeddingRetriever)
+
+
+def get_answerer():
+    from llm_answer import GPTAnswer
+
+    return _get_shared("answerer", GPTAnswer)
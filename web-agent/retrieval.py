@@ -1,47 +1,181 @@
-import yaml
+import asyncio
+import hashlib
+import threading
+import numpy as np
 import os
-from fetch_web_content import WebContentFetcher
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.vectorstores import Chroma
-from langchain.embeddings import OpenAIEmbeddings
-from langchain.embeddings.sentence_transformer import SentenceTransformerEmbeddings
+from embedding_cache import DEFAULT_CACHE_DIRECTORY, CachedEmbeddings
+from registry import get_config
+
+# langchain, Chroma and the embedding backends are imported on first use, since each costs
+# hundreds of milliseconds and a worker only ever needs one backend
+
+PERSIST_DIRECTORY = os.path.join(os.path.dirname(__file__), ".swift_cache", "chroma")
+EMBEDDING_MODEL = 'text-embedding-ada-002'
+LOCAL_EMBEDDING_MODEL = 'all-MiniLM-L6-v2'  # Small and fast on CPU; see config.yaml.example
+
+
+def top_k_indices(vectors, query_vector, k):
+    # Indices of the k rows most similar to query_vector (cosine), best first
+    vectors = np.asarray(vectors, dtype=np.float32)
+    query_vector = np.asarray(query_vector, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1)
+    norms[norms == 0] = 1.0
+    scores = (vectors @ query_vector) / (norms * (np.linalg.norm(query_vector) or 1.0))
+    k = min(k, len(scores))
+    if k == 0:
+        return np.empty(0, dtype=np.int64)
+    # argpartition finds the top k in linear time; only those k are sorted
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind="stable")]
+
 
 class EmbeddingRetriever:
     TOP_K = 10  # Number of top K documents to retrieve
 
-    def __init__(self):
-        # Load configuration from config.yaml file
-        config_path = os.path.join(os.path.dirname(__file__), 'config', 'config.yaml')
-        with open(config_path, 'r') as file:
-            self.config = yaml.safe_load(file)
+    def __init__(self, persist_directory=PERSIST_DIRECTORY):
+        # Configuration from config.yaml, parsed once per process
+        self.config = get_config()
+
+        # The text splitter is created on first use
+        self.text_splitter = None
 
-        # Initialize the text splitter
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=0
+        # The vector store persists across queries and runs; it is opened on first use
+        self.persist_directory = persist_directory
+        self.db = None
+        self.db_lock = threading.Lock()
+        self.embedded_chunks = 0  # Chunks sent to the embedding model by this retriever
+        self.reused_chunks = 0  # Chunks found already embedded in the store or the embedding cache
+
+        # "openai" embeds remotely into the Chroma store; "local" encodes on this machine with
+        # sentence-transformers and ranks in memory, so retrieval needs no network at all
+        self.backend = self.config.get("embedding_backend", "openai")
+        self.local_model = None
+        self.local_model_lock = threading.Lock()
+
+        # Vectors are memoized per model and text in a memory-mapped cache shared by all processes
+        self.embedding_cache_directory = (
+            DEFAULT_CACHE_DIRECTORY if self.config.get("embedding_cache", True) else None
         )
+        self.embeddings = None  # The (cached) embedding function of the backend in use
+
+    def _cached(self, embeddings, model_name):
+        if self.embedding_cache_directory is None:
+            return embeddings
+        directory = os.path.join(self.embedding_cache_directory, model_name.replace("/", "--"))
+        return CachedEmbeddings(embeddings, directory)
+
+    def _get_text_splitter(self):
+        if self.text_splitter is None:
+            from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+            self.text_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=1000,
+                chunk_overlap=0
+            )
+        return self.text_splitter
+
+    def _get_db(self):
+        # One collection per embedding model, so vectors from different models never mix
+        with self.db_lock:
+            if self.db is None:
+                from langchain.embeddings.openai import OpenAIEmbeddings
+                from langchain.vectorstores.chroma import Chroma
+
+                self.embeddings = self._cached(
+                    OpenAIEmbeddings(
+                        model=EMBEDDING_MODEL,
+                        openai_api_key=self.config["openai_api_key"],
+                        openai_api_base=self.config.get("openai_api_base"),
+                    ),
+                    EMBEDDING_MODEL,
+                )
+                self.db = Chroma(
+                    collection_name=f"web-chunks-{EMBEDDING_MODEL}",
+
+                    # Select one of the models from OpenAIEmbeddings and text2vec-base-chinese to suit your needs:
+
+                    embedding_function=self.embeddings,
+                    # embedding_function=SentenceTransformerEmbeddings(model_name="shibing624/text2vec-base-chinese"),
+                    persist_directory=self.persist_directory,
+                )
+            return self.db
+
+    def _get_local_model(self):
+        # Loaded on first use: sentence-transformers (and torch) are only needed for this backend
+        with self.db_lock:
+            if self.local_model is None:
+                from langchain.embeddings.sentence_transformer import SentenceTransformerEmbeddings
+
+                model_name = self.config.get("local_embedding_model", LOCAL_EMBEDDING_MODEL)
+                self.local_model = self._cached(
+                    SentenceTransformerEmbeddings(model_name=model_name, encode_kwargs={"batch_size": 64}),
+                    model_name,
+                )
+                self.embeddings = self.local_model
+            return self.local_model
+
+    @staticmethod
+    def chunk_id(url: str, content: str):
+        # Chunks are keyed by their page and content, so a changed page gets new chunks
+        return hashlib.sha256(f"{url}\0{content}".encode("utf-8")).hexdigest()
 
     def retrieve_embeddings(self, contents_list: list, link_list: list, query: str):
         # Retrieve embeddings for a given list of contents and a query
         metadatas = [{'url': link} for link in link_list]
-        texts = self.text_splitter.create_documents(contents_list, metadatas=metadatas)
+        texts = self._get_text_splitter().create_documents(contents_list, metadatas=metadatas)
 
-        # Create a Chroma database from the documents using specific embeddings
-        db = Chroma.from_documents(
-            texts,
+        chunks = {}
+        for doc in texts:
+            chunk_id = self.chunk_id(doc.metadata['url'], doc.page_content)
+            doc.metadata['chunk_id'] = chunk_id
+            chunks.setdefault(chunk_id, doc)
+        if not chunks:
+            return []
+        if self.backend == "local":
+            return self._retrieve_local(list(chunks.values()), query)
 
-            # Select one of the models from OpenAIEmbeddings and text2vec-base-chinese to suit your needs:
-            
-            OpenAIEmbeddings(model='text-embedding-ada-002', openai_api_key=self.config["openai_api_key"])
-            # SentenceTransformerEmbeddings(model_name="shibing624/text2vec-base-chinese")
-        )
+        # Embed only the chunks that are not in the store yet
+        db = self._get_db()
+        chunk_ids = list(chunks)
+        existing = set(db.get(ids=chunk_ids, include=[])["ids"])
+        new_ids = [chunk_id for chunk_id in chunk_ids if chunk_id not in existing]
+        if new_ids:
+            db.add_texts(
+                [chunks[chunk_id].page_content for chunk_id in new_ids],
+                metadatas=[chunks[chunk_id].metadata for chunk_id in new_ids],
+                ids=new_ids,
+            )
+        self.embedded_chunks += len(new_ids)
+        self.reused_chunks += len(existing)
+
+        # Search only the chunks of this search's pages, as they are now
+        where = {"chunk_id": chunk_ids[0]} if len(chunk_ids) == 1 else {"chunk_id": {"$in": chunk_ids}}
+        return db.similarity_search(query, k=min(self.TOP_K, len(chunk_ids)), filter=where)
 
-        # Create a retriever from the database to find relevant documents
-        retriever = db.as_retriever(search_kwargs={"k": self.TOP_K})
-        return retriever.get_relevant_documents(query) # Retrieve and return the relevant documents
+    def _retrieve_local(self, docs: list, query: str):
+        # One batched encode for all chunks plus the query (cached texts are skipped), then an
+        # exact top-k with NumPy
+        model = self._get_local_model()
+        texts = [doc.page_content for doc in docs] + [query]
+        with self.local_model_lock:
+            # torch already spreads one batch over every core, so encodes run one at a time
+            if isinstance(model, CachedEmbeddings):
+                vectors, found = model.embed_documents_cached(texts)
+            else:
+                vectors, found = model.embed_documents(texts), np.zeros(len(texts), dtype=bool)
+        # Only chunks that reached the model count as embedded; the query is not a chunk
+        self.embedded_chunks += int(np.count_nonzero(~found[:-1]))
+        self.reused_chunks += int(np.count_nonzero(found[:-1]))
+        return [docs[i] for i in top_k_indices(vectors[:-1], vectors[-1], self.TOP_K)]
+
+    async def aretrieve_embeddings(self, contents_list: list, link_list: list, query: str):
+        # Async version of retrieve_embeddings(); Chroma is blocking, so it runs in a worker thread
+        return await asyncio.to_thread(self.retrieve_embeddings, contents_list, link_list, query)
 
 # Example usage
 if __name__ == "__main__":
+    from fetch_web_content import WebContentFetcher
+
     query = "What happened to Silicon Valley Bank"
 
     # Create a WebContentFetcher instance and fetch web contents
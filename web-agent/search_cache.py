@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from sqlite_lru import SqliteLRU
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(__file__), ".swift_cache", "searches.sqlite")
+MAX_KEYWORDS = 12
+WORD_PATTERN = re.compile(r"\w+")
+STOPWORDS = frozenset(
+    "a about above after again all also an and any are as at be because been before being "
+    "below between both but by can could did do does doing down during each even every few "
+    "for from further had has have having he her here hers him his how however i if in into "
+    "is it its itself just like make many may more most much must my no nor not now of off "
+    "on once one only or other our out over own per problem same she should so solution "
+    "some such than that the their them then there these they this those through to too "
+    "under until up upon us use used using very via was we were what when where which while "
+    "who whom why will with within without would you your".split()
+)
+
+
+def normalize_query(query, keywords=False):
+    """
+    Cache key text for a search query: case and whitespace are folded, so reformatted copies
+    of an idea share one entry. With keywords=True the query is reduced to its most frequent
+    content words in alphabetical order, so near-identical ideas share results as well.
+    """
+    folded = " ".join(query.casefold().split())
+    if not keywords:
+        return folded
+    words = [
+        # Crude plural folding, so "bottle" and "bottles" count as one keyword
+        word[:-1] if len(word) > 4 and word.endswith("s") and not word.endswith("ss") else word
+        for word in WORD_PATTERN.findall(folded)
+        if len(word) > 2 and word not in STOPWORDS and not word.isdigit()
+    ]
+    if not words:
+        return folded
+    # Counter keeps first-seen order among equal counts, so the choice is deterministic
+    top = [word for word, _ in Counter(words).most_common(MAX_KEYWORDS)]
+    return " ".join(sorted(top))
+
+
+class SearchCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=7 * 24 * 3600, max_bytes=64 * 1024 * 1024):
+        # Open (or create) the on-disk cache of search responses; entries expire after ttl seconds
+        # and least recently used ones are evicted past max_bytes
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS searches ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS searches_last_access ON searches (last_access)"
+        )
+        self.conn.commit()
+        self.lru = SqliteLRU(self.conn, "searches", "key", max_bytes)
+
+    @staticmethod
+    def make_key(normalized_query, settings):
+        # Key over the normalized query and the other search settings (country, language, page)
+        payload = json.dumps({"q": normalized_query, **settings}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        # Return the cached search response for key, or None on a miss or an expired entry
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT response, created FROM searches WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] >= self.ttl:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.conn.execute("UPDATE searches SET last_access = ? WHERE key = ?", (now, key))
+            self.conn.commit()
+        return json.loads(row[0])
+
+    def put(self, key, response):
+        # Store a search response and evict the least recently used entries if the cache is too big
+        payload = json.dumps(response, ensure_ascii=False)
+        now = time.time()
+        with self.lock:
+            self.lru.put(
+                {"key": key, "response": payload, "size": len(payload.encode("utf-8")), "created": now, "last_access": now}
+            )
+            self.conn.commit()
+
+    def stats(self):
+        # Hit/miss counters for this session plus the current size of the cache
+        with self.lock:
+            entries, size = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM searches"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def clear(self):
+        # Remove every cached search
+        with self.lock:
+            self.lru.clear()
+            self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+# Example usage
+if __name__ == "__main__":
+    first = "Problem: The usage of plastic bottles. Solution: Refill stations for bottles in stores."
+    second = "problem:  the usage of PLASTIC bottles.  Solution: refill stations for bottles in  stores."
+    print(normalize_query(first) == normalize_query(second))
+    print(normalize_query(first, keywords=True))
@@ -1,24 +1,67 @@
 import requests
 import re
 import json
-import yaml
-import os
+import threading
+from registry import get_config
+from search_cache import SearchCache, normalize_query
+
+SERPER_URL = "https://google.serper.dev/search"
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_shared_search_cache():
+    # One on-disk search cache for every client in the process
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = SearchCache()
+        return _shared_cache
+
 
 class SerperClient:
-    def __init__(self):
-        # Load configuration from config.yaml file
-        config_path = os.path.join(os.path.dirname(__file__), 'config', 'config.yaml')
-        with open(config_path, 'r') as file:
-            config = yaml.safe_load(file)
+    def __init__(self, cache=None):
+        # Configuration from config.yaml, parsed once per process
+        config = get_config()
 
         # Set up the URL and headers for the Serper API
-        self.url = "https://google.serper.dev/search"
+        self.url = config.get("serper_url", SERPER_URL)
         self.headers = {
             "X-API-KEY": config["serper_api_key"],  # API key from config file
             "Content-Type": "application/json"
         }
 
+        # Search results are cached on disk by normalized query (cache=False disables this);
+        # search_cache_keywords also lets near-identical ideas share one search
+        if cache is None and config.get("search_cache", True):
+            cache = get_shared_search_cache()
+        self.cache = cache or None
+        self.cache_keywords = config.get("search_cache_keywords", False)
+
     def serper(self, query: str):
+        serper_settings = self._build_settings(query)
+        cache_key = self._cache_key(serper_settings)
+        cached = self.cache.get(cache_key) if self.cache else None
+        if cached is not None:
+            return cached
+
+        # Perform the POST request to the Serper API and return the JSON response
+        response = requests.request("POST", self.url, headers=self.headers, data=json.dumps(serper_settings))
+        return self._store(cache_key, response.json())
+
+    async def aserper(self, query: str, session):
+        # Async version of serper() on a shared aiohttp.ClientSession
+        serper_settings = self._build_settings(query)
+        cache_key = self._cache_key(serper_settings)
+        cached = self.cache.get(cache_key) if self.cache else None
+        if cached is not None:
+            return cached
+
+        async with session.post(self.url, headers=self.headers, data=json.dumps(serper_settings)) as response:
+            return self._store(cache_key, await response.json(content_type=None))
+
+    def _build_settings(self, query: str):
         # Configure the query parameters for Serper API
         serper_settings = {"q": query, "page": 2}
 
@@ -26,17 +69,34 @@ class SerperClient:
         if self._contains_chinese(query):
             serper_settings.update({"gl": "cn", "hl": "zh-cn",})
 
-        payload = json.dumps(serper_settings)
+        return serper_settings
 
-        # Perform the POST request to the Serper API and return the JSON response
-        response = requests.request("POST", self.url, headers=self.headers, data=payload)
-        return response.json()
+    def _cache_key(self, serper_settings: dict):
+        if not self.cache:
+            return None
+        settings = {key: value for key, value in serper_settings.items() if key != "q"}
+        settings["url"] = self.url
+        return self.cache.make_key(normalize_query(serper_settings["q"], self.cache_keywords), settings)
+
+    def _store(self, cache_key, serper_response: dict):
+        # Only successful searches are cached; errors (bad key, quota) are retried next time
+        if self.cache and "organic" in serper_response:
+            self.cache.put(cache_key, serper_response)
+        return serper_response
 
     def _contains_chinese(self, query: str):
         # Check if a string contains Chinese characters using a regular expression
         pattern = re.compile(r'[\u4e00-\u9fff]+')
         return bool(pattern.search(query))
 
+    @staticmethod
+    def build_link_index(links: list):
+        # Map each link to its position in the results (first occurrence), for O(1) lookups
+        link_index = {}
+        for i, link in enumerate(links):
+            link_index.setdefault(link, i)
+        return link_index
+
     def extract_components(self, serper_response: dict):
         # Initialize lists to store the extracted components
         titles, links, snippets = [], [], []
@@ -59,7 +119,8 @@ class SerperClient:
             'count': count, 
             'titles': titles, 
             'links': links, 
-            'snippets': snippets
+            'snippets': snippets,
+            'link_index': self.build_link_index(links),
         }
 
         return output_dict
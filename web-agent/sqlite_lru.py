@@ -0,0 +1 @@
+../sqlite_lru.py
\ No newline at end of file
@@ -1,11 +1,181 @@
+import asyncio
 import requests
 import re
-from bs4 import BeautifulSoup
+import threading
+import time
+import codecs
+from concurrent.futures import ThreadPoolExecutor
+from lxml import etree
+from requests.adapters import HTTPAdapter
+from page_cache import PageCache
+
+POOL_SIZE = 32  # Keep-alive connections kept per host by the shared session
+TIMEOUT = 8  # Seconds allowed for one page download
+MAX_BODY_BYTES = 2 * 1024 * 1024  # Streaming extraction stops reading a page past this size
+CHUNK_SIZE = 64 * 1024  # Bytes fed to the streaming parser at a time
+
+# Tag rules of extract_main_content(): rule 0 keeps headings and paragraphs, rule 1 also divs
+RULE_PATTERNS = {0: re.compile("^(h[1-6]|p)"), 1: re.compile("^(h[1-6]|p|div)")}
+SKIPPED_TAGS = {"script", "style", "template"}  # BeautifulSoup's get_text() leaves these out
+# Every string below a <template>, however deep, is a TemplateString to BeautifulSoup, so even a
+# <p> nested in a template has no text
+HIDDEN_SUBTREE_TAGS = {"template"}
+PRESERVE_WHITESPACE_TAGS = {"pre", "textarea"}  # Elsewhere BeautifulSoup collapses blank strings
+
+_shared_session = None
+_shared_session_lock = threading.Lock()
+
+
+def get_shared_session():
+    # One pooled session for every scraper, so connections are reused across pages and queries
+    global _shared_session
+    with _shared_session_lock:
+        if _shared_session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _shared_session = session
+        return _shared_session
+
+
+_shared_page_cache = None
+
+
+def get_shared_page_cache():
+    # One on-disk page cache for every scraper in the process
+    global _shared_page_cache
+    with _shared_session_lock:
+        if _shared_page_cache is None:
+            _shared_page_cache = PageCache()
+        return _shared_page_cache
+
+
+def _cached_response(url, body):
+    # Wrap a cached body in a Response, so callers cannot tell it from a download
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    response._content = body
+    response.encoding = "utf-8"
+    return response
+
+
+class MainContentExtractor:
+    def __init__(self):
+        """
+        Single-pass, incremental version of extract_main_content() for both tag rules at once.
+        Feed the page in chunks and call close() for {rule: content}. Text is only assembled for
+        elements inside a matching tag, and finished elements are dropped from the tree, so
+        memory stays proportional to the matched text rather than the whole document.
+        """
+        self.parser = etree.HTMLPullParser(events=("start", "end"))
+        self.decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        # One frame per open element: [needed, position, rules, child_texts, preserve, hidden]
+        self.stack = []
+        self.blocks = {rule: [] for rule in RULE_PATTERNS}  # Rule -> [(position, text)]
+        self.position = 0
+        self.parse_seconds = 0.0  # Time spent in the HTML parser
+        self.extract_seconds = 0.0  # Time spent assembling and filtering text
+
+    def feed(self, data):
+        # Feed the next chunk of the page (bytes are decoded as UTF-8, like get_webpage_html())
+        if isinstance(data, bytes):
+            data = self.decoder.decode(data)
+        if data:
+            start = time.time()
+            self.parser.feed(data)
+            parsed = time.time()
+            self._process_events()
+            self.parse_seconds += parsed - start
+            self.extract_seconds += time.time() - parsed
+
+    def close(self):
+        # Finish parsing and return the extracted content for every rule
+        start = time.time()
+        tail = self.decoder.decode(b"", final=True)
+        if tail:
+            self.parser.feed(tail)
+        try:
+            self.parser.close()
+        except etree.XMLSyntaxError:
+            pass  # Empty or unparsable page
+        parsed = time.time()
+        self._process_events()
+        contents = {
+            rule: "\n".join(text for _, text in sorted(blocks)).strip()
+            for rule, blocks in self.blocks.items()
+        }
+        self.parse_seconds += parsed - start
+        self.extract_seconds += time.time() - parsed
+        return contents
+
+    def _process_events(self):
+        for event, element in self.parser.read_events():
+            if event == "start":
+                self._start(element)
+            else:
+                self._end(element)
+
+    def _start(self, element):
+        tag = element.tag if isinstance(element.tag, str) else ""
+        rules = [rule for rule, pattern in RULE_PATTERNS.items() if pattern.match(tag)]
+        parent = self.stack[-1] if self.stack else None
+        needed = bool(rules) or (parent is not None and parent[0])
+        preserve = tag in PRESERVE_WHITESPACE_TAGS or (parent is not None and parent[4])
+        hidden = tag in HIDDEN_SUBTREE_TAGS or (parent is not None and parent[5])
+        self.stack.append([needed, self.position, rules, [], preserve, hidden])
+        self.position += 1
+
+    @staticmethod
+    def _string(text, preserve):
+        # BeautifulSoup turns whitespace-only strings into "\n" or " " outside <pre>/<textarea>
+        if not text or preserve or text.strip(" \n\t\f\r"):
+            return text or ""
+        return "\n" if "\n" in text else " "
+
+    def _end(self, element):
+        needed, position, rules, child_texts, preserve, hidden = self.stack.pop()
+        parent = self.stack[-1] if self.stack else None
+
+        if needed:
+            # Same text as get_text(): own text, then each child's text followed by its tail
+            if element.tag in SKIPPED_TAGS or hidden:
+                text = ""
+            else:
+                parts = [self._string(element.text, preserve)]
+                texts = iter(child_texts)
+                for child in element:
+                    if isinstance(child.tag, str):
+                        parts.append(next(texts, ""))
+                    parts.append(self._string(child.tail, preserve))
+                text = "".join(parts)
+            if parent is not None and parent[0]:
+                parent[3].append(text)
+
+            tag_text = text.strip()
+            if tag_text and len(tag_text.split()) > 10:
+                for rule in rules:
+                    self.blocks[rule].append((position, tag_text))
+
+        # Children are no longer needed once an element is done; unless the parent still needs
+        # this element's tail, earlier siblings can go as well
+        del element[:]
+        if parent is not None and not parent[0]:
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+
 
 class WebScraper:
-    def __init__(self, user_agent='macOS'):
-        # Initialize the scraper with a user agent (default is 'macOS')
+    def __init__(self, user_agent='macOS', session=None, page_cache=None):
+        # Initialize the scraper with a user agent (default is 'macOS'), a pooled HTTP session
+        # and the shared page cache (page_cache=False downloads every page)
         self.headers = self._get_headers(user_agent)
+        self.session = session if session is not None else get_shared_session()
+        if page_cache is None:
+            page_cache = get_shared_page_cache()
+        self.page_cache = page_cache or None
+        self.timings = {}  # Seconds spent to fetch, parse and extract the last scraped page
 
     def _get_headers(self, user_agent):
         # Private method to get headers for the request based on the specified user agent
@@ -35,18 +205,150 @@ class WebScraper:
             # Skip PDF files which are time consuming
             return response
 
+        # Serve fresh pages from the cache; revalidate stale ones with a conditional GET
+        cached = self.page_cache.get(url) if self.page_cache else None
+        if cached is not None and cached["fresh"]:
+            return _cached_response(url, cached["body"])
+        headers = {**self.headers, **self.page_cache.conditional_headers(cached)} if self.page_cache else self.headers
+
         try:
             # Attempt to get the webpage content with specified headers and timeout
-            response = requests.get(url, headers=self.headers, timeout=8)
+            response = self.session.get(url, headers=headers, timeout=TIMEOUT)
             response.encoding = "utf-8"
         except requests.exceptions.Timeout:
-            # Add timeout exception handling here
-            return response
-        
+            # Add timeout exception handling here; a stale copy beats an empty page
+            return _cached_response(url, cached["body"]) if cached is not None else response
+
+        if cached is not None and response.status_code == 304:
+            self.page_cache.touch(url)
+            return _cached_response(url, cached["body"])
+        if self.page_cache and response.status_code == 200:
+            self.page_cache.put(
+                url, response.content, response.headers.get("ETag"), response.headers.get("Last-Modified")
+            )
         return response
 
+    async def aget_webpage_html(self, url, session):
+        # Async version of get_webpage_html() on a shared aiohttp.ClientSession; returns the HTML text
+        # (aiohttp is only imported by the async paths, which already run on one of its sessions);
+        # page cache reads and writes decompress and hit SQLite, so they run in worker threads
+        import aiohttp
+
+        if url.endswith(".pdf"):
+            # Skip PDF files which are time consuming
+            return ""
+
+        cached = await asyncio.to_thread(self.page_cache.get, url) if self.page_cache else None
+        if cached is not None and cached["fresh"]:
+            return cached["body"].decode("utf-8", errors="replace")
+        headers = {**self.headers, **self.page_cache.conditional_headers(cached)} if self.page_cache else self.headers
+
+        try:
+            async with session.get(
+                url, headers=headers, timeout=aiohttp.ClientTimeout(total=TIMEOUT)
+            ) as response:
+                if cached is not None and response.status == 304:
+                    await asyncio.to_thread(self.page_cache.touch, url)
+                    body = cached["body"]
+                else:
+                    body = await response.read()
+                    if self.page_cache and response.status == 200:
+                        await asyncio.to_thread(
+                            self.page_cache.put,
+                            url, body, response.headers.get("ETag"), response.headers.get("Last-Modified")
+                        )
+        except asyncio.TimeoutError:
+            # Same as the blocking version: a timeout yields a stale copy or an empty page
+            body = cached["body"] if cached is not None else b""
+        return body.decode("utf-8", errors="replace")
+
+    def iter_webpage_chunks(self, url, max_bytes=MAX_BODY_BYTES, cancelled=None):
+        # Yield the body of a webpage in chunks, stopping after max_bytes or once the optional
+        # cancelled event is set (checked after each CHUNK_SIZE chunk, so a slow page can still
+        # run on until its current chunk or TIMEOUT); uses the page cache like get_webpage_html()
+        if url.endswith(".pdf"):
+            # Skip PDF files which are time consuming
+            return
+
+        cached = self.page_cache.get(url) if self.page_cache else None
+        if cached is not None and cached["fresh"]:
+            yield cached["body"][:max_bytes]
+            return
+        headers = {**self.headers, **self.page_cache.conditional_headers(cached)} if self.page_cache else self.headers
+
+        try:
+            response = self.session.get(url, headers=headers, timeout=TIMEOUT, stream=True)
+        except requests.exceptions.Timeout:
+            if cached is not None:
+                yield cached["body"][:max_bytes]
+            return
+
+        with response:
+            if cached is not None and response.status_code == 304:
+                self.page_cache.touch(url)
+                yield cached["body"][:max_bytes]
+                return
+            chunks, size, truncated = [], 0, False
+            for chunk in response.iter_content(CHUNK_SIZE):
+                chunk = chunk[: max_bytes - size]
+                chunks.append(chunk)
+                size += len(chunk)
+                yield chunk
+                if size >= max_bytes or (cancelled is not None and cancelled.is_set()):
+                    truncated = True
+                    break
+            # A cut-off body is never cached: a 304 would keep it alive under the page's real
+            # validators, and get_webpage_html() would serve it as the whole page
+            if self.page_cache and response.status_code == 200 and not truncated:
+                self.page_cache.put(
+                    url, b"".join(chunks), response.headers.get("ETag"), response.headers.get("Last-Modified")
+                )
+
+    async def aiter_webpage_chunks(self, url, session, max_bytes=MAX_BODY_BYTES):
+        # Async version of iter_webpage_chunks() on a shared aiohttp.ClientSession
+        import aiohttp
+
+        if url.endswith(".pdf"):
+            return
+
+        cached = await asyncio.to_thread(self.page_cache.get, url) if self.page_cache else None
+        if cached is not None and cached["fresh"]:
+            yield cached["body"][:max_bytes]
+            return
+        headers = {**self.headers, **self.page_cache.conditional_headers(cached)} if self.page_cache else self.headers
+
+        try:
+            async with session.get(
+                url, headers=headers, timeout=aiohttp.ClientTimeout(total=TIMEOUT)
+            ) as response:
+                if cached is not None and response.status == 304:
+                    await asyncio.to_thread(self.page_cache.touch, url)
+                    yield cached["body"][:max_bytes]
+                    return
+                chunks, size, truncated = [], 0, False
+                async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                    chunk = chunk[: max_bytes - size]
+                    chunks.append(chunk)
+                    size += len(chunk)
+                    yield chunk
+                    if size >= max_bytes:
+                        truncated = True
+                        break
+                # Cut-off bodies are not cached, as in iter_webpage_chunks()
+                if self.page_cache and response.status == 200 and not truncated:
+                    await asyncio.to_thread(
+                        self.page_cache.put,
+                        url, b"".join(chunks), response.headers.get("ETag"), response.headers.get("Last-Modified")
+                    )
+        except asyncio.TimeoutError:
+            if cached is not None:
+                yield cached["body"][:max_bytes]
+
     def convert_html_to_soup(self, html):
-        # Convert the HTML string to a BeautifulSoup object for parsing
+        # Convert the HTML string to a BeautifulSoup object for parsing (bs4 is only imported
+        # here, since scraping itself uses the streaming extractor)
+        from bs4 import BeautifulSoup
+
         html_string = html.text
         return BeautifulSoup(html_string, "lxml")
 
@@ -63,11 +365,62 @@ class WebScraper:
 
     def scrape_url(self, url, rule=0):
         # Public method to scrape a URL and extract its main content
+        start = time.time()
         webpage_html = self.get_webpage_html(url)
+        fetched = time.time()
         soup = self.convert_html_to_soup(webpage_html)
+        parsed = time.time()
         main_content = self.extract_main_content(soup, rule)
+        self.timings = {"fetch": fetched - start, "parse": parsed - fetched, "extract": time.time() - parsed}
         return main_content
 
+    async def ascrape_url(self, url, session, rule=0):
+        # Async version of scrape_url(); parsing runs in a worker thread so the event loop stays free
+        html_string = await self.aget_webpage_html(url, session)
+        return await asyncio.to_thread(self._extract_from_html, html_string, rule)
+
+    def scrape_url_all_rules(self, url, max_bytes=MAX_BODY_BYTES, cancelled=None):
+        # Streaming mode: download at most max_bytes and extract both tag rules in one pass;
+        # setting the cancelled event stops the download early
+        start = time.time()
+        extractor = MainContentExtractor()
+        for chunk in self.iter_webpage_chunks(url, max_bytes, cancelled):
+            extractor.feed(chunk)
+        contents = extractor.close()
+        self._record_timings(extractor, time.time() - start)
+        return contents
+
+    async def ascrape_url_all_rules(self, url, session, max_bytes=MAX_BODY_BYTES):
+        # Async version of scrape_url_all_rules(); each chunk is parsed as it arrives, off the event
+        # loop so it keeps serving the other downloads. An lxml parser must stay on the thread that
+        # created it, so every page gets one worker thread of its own
+        start = time.time()
+        loop = asyncio.get_running_loop()
+        parser_thread = ThreadPoolExecutor(max_workers=1)
+        try:
+            extractor = await loop.run_in_executor(parser_thread, MainContentExtractor)
+            async for chunk in self.aiter_webpage_chunks(url, session, max_bytes):
+                await loop.run_in_executor(parser_thread, extractor.feed, chunk)
+            contents = await loop.run_in_executor(parser_thread, extractor.close)
+        finally:
+            parser_thread.shutdown(wait=False)
+        self._record_timings(extractor, time.time() - start)
+        return contents
+
+    def _record_timings(self, extractor, total):
+        # Download and parsing are interleaved, so fetch time is what the parser did not use
+        self.timings = {
+            "fetch": max(0.0, total - extractor.parse_seconds - extractor.extract_seconds),
+            "parse": extractor.parse_seconds,
+            "extract": extractor.extract_seconds,
+        }
+
+    def _extract_from_html(self, html_string, rule):
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(html_string, "lxml")
+        return self.extract_main_content(soup, rule)
+
 # Example usage
 if __name__ == "__main__":
     scraper = WebScraper(user_agent='macOS')